@@ -0,0 +1,113 @@
+"""
+Vista en memoria de los pedidos activos (un proceso).
+
+Las pantallas de cocina y delivery solo miran pedidos pendiente, preparando,
+completado y en_ruta. database.py la carga al arrancar (load_active_orders)
+y la mantiene al día en cada escritura de pedidos; /api/orders/active
+responde desde aquí sin ir a Mongo.
+
+Cada estado guarda sus pedidos en orden de llegada (created_at, id). Con
+varios workers cada proceso solo ve sus propias escrituras: por eso
+database.get_active_orders recarga desde Mongo cada ACTIVE_ORDERS_TTL.
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+
+ACTIVE_STATES = ["pendiente", "preparando", "completado", "en_ruta"]
+
+_lock = threading.Lock()
+_orders = {}                                # id -> pedido (formato de Mongo)
+_queues = {s: [] for s in ACTIVE_STATES}    # estado -> [(created_at, id)] ordenado
+# journal: cambios recibidos mientras se lee Mongo en una recarga
+_state = {"version": 0, "loaded_at": None, "journal": None}
+
+
+def _key(order: dict):
+    return (order.get("created_at") or datetime.min, order["id"])
+
+
+def _insert(order: dict):
+    _orders[order["id"]] = order
+    bisect.insort(_queues[order["estado"]], _key(order))
+
+
+def _remove(order: dict):
+    queue = _queues[order["estado"]]
+    i = bisect.bisect_left(queue, _key(order))
+    if i < len(queue) and queue[i][1] == order["id"]:
+        del queue[i]
+    del _orders[order["id"]]
+
+
+def _add(order: dict):
+    if order["id"] in _orders: _remove(_orders[order["id"]])
+    _insert(dict(order))
+
+
+def _apply(order_id: int, update: dict) -> bool:
+    """False si el pedido no está en la vista (no se puede aplicar)."""
+    order = _orders.get(order_id)
+    if order is None:
+        return False
+    # Dict nuevo: los snapshots ya entregados no cambian
+    _remove(order)
+    order = {**order, **update}
+    if order["estado"] in _queues: _insert(order)
+    return True
+
+
+def begin_load():
+    """Llamar antes de leer Mongo: los cambios de mientras se aplican después en replace()."""
+    with _lock:
+        _state["journal"] = []
+
+
+def replace(orders):
+    """Reemplaza la vista completa (carga inicial y recargas)."""
+    with _lock:
+        _orders.clear()
+        for queue in _queues.values(): queue.clear()
+        for order in orders:
+            if order.get("estado") in _queues:
+                _insert(dict(order))
+        for change in _state["journal"] or []:
+            if change[0] == "add": _add(change[1])
+            else: _apply(*change[1:])
+        _state["journal"] = None
+        _state["version"] += 1
+        _state["loaded_at"] = time.monotonic()
+
+
+def add(order: dict):
+    if order.get("estado") not in _queues: return
+    with _lock:
+        if _state["journal"] is not None: _state["journal"].append(("add", dict(order)))
+        _add(order)
+        _state["version"] += 1
+
+
+def apply(order_id: int, update: dict):
+    """Aplica un $set de estado; si el pedido sale de los estados activos deja la vista."""
+    with _lock:
+        if _state["journal"] is not None: _state["journal"].append(("apply", order_id, update))
+        if _apply(order_id, update):
+            _state["version"] += 1
+        elif update.get("estado") in _queues:
+            # Activo en Mongo pero no aquí (lo escribió otro proceso): recargar en la próxima lectura
+            _state["loaded_at"] = None
+
+
+def age() -> float:
+    """Segundos desde la última carga completa (infinito si hay que recargar)."""
+    loaded_at = _state["loaded_at"]
+    return float("inf") if loaded_at is None else time.monotonic() - loaded_at
+
+
+def snapshot(estados=None) -> tuple:
+    """(version, pedidos) de los estados pedidos, en orden de llegada dentro de cada estado."""
+    with _lock:
+        orders = [_orders[order_id] for estado in (estados or ACTIVE_STATES) if estado in _queues
+                  for _, order_id in _queues[estado]]
+        return _state["version"], orders
@@ -0,0 +1,237 @@
+"""
+Archivo de pedidos terminados (datos fríos fuera de Mongo).
+
+"python manage.py archive-orders --days 90" mueve los pedidos entregados o
+anulados de hace más de N días, con sus boletas, a archivos de segmento:
+NDJSON comprimido (zstd si está instalado zstandard, si no gzip), uno por
+día y tipo, ej: archive/2025/01/orders-2025-01-31-1.ndjson.gz.
+
+manifest.json describe cada segmento (rango de ids de pedido, rango de
+fechas y un filtro de Bloom de los clientes) para abrir solo los que pueden
+contener lo buscado. Las lecturas de database.py (pedido por id, historial,
+boleta, exportación y reconstrucción de contadores) recurren al archivo
+cuando el pedido ya no está en Mongo.
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # gzip de la librería estándar
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", Path(__file__).resolve().parent / "archive"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+MANIFEST_NAME = "manifest.json"
+# Un día con más pedidos se divide en varias partes
+SEGMENT_MAX_DOCS = 20_000
+# Segmentos descomprimidos que se mantienen en memoria
+CACHE_SEGMENTS = int(os.getenv("ARCHIVE_CACHE_SEGMENTS", "8"))
+ZSTD_LEVEL = 10
+
+# Campo con el id de pedido y campo de fecha de cada tipo de segmento
+KINDS = {"orders": ("id", "created_at"), "receipts": ("order_id", "date")}
+
+BLOOM_BITS_PER_ITEM = 10
+BLOOM_HASHES = 4
+
+_lock = threading.Lock()
+_manifest = {"mtime": None, "segments": []}
+_cache = OrderedDict()
+
+
+# --- Formato ---
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(doc: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(doc, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(doc, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(line: bytes) -> dict:
+    doc = orjson.loads(line) if orjson is not None else json.loads(line)
+    # Las fechas vuelven a ser datetime, como las entrega Mongo
+    for key, value in doc.items():
+        if isinstance(value, str) and (key.endswith("_at") or key == "date"):
+            try:
+                doc[key] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return doc
+
+
+def _compress(data: bytes) -> tuple:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data), "zst"
+    return gzip.compress(data, compresslevel=6), "gz"
+
+
+def _decompress(path: Path) -> bytes:
+    data = path.read_bytes()
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path} usa zstd pero zstandard no está instalado")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+# --- Filtro de Bloom de clientes por segmento ---
+def _bloom_positions(value, bits: int):
+    digest = hashlib.blake2b(str(value).encode(), digest_size=4 * BLOOM_HASHES).digest()
+    return [int.from_bytes(digest[i:i + 4], "little") % bits for i in range(0, len(digest), 4)]
+
+
+def _bloom(values) -> str:
+    values = set(values)
+    bits = max(64, len(values) * BLOOM_BITS_PER_ITEM)
+    array = bytearray((bits + 7) // 8)
+    for value in values:
+        for pos in _bloom_positions(value, bits):
+            array[pos // 8] |= 1 << (pos % 8)
+    return base64.b64encode(bytes(array)).decode()
+
+
+def _bloom_contains(bloom: str, value) -> bool:
+    array = base64.b64decode(bloom)
+    return all(array[pos // 8] & (1 << (pos % 8)) for pos in _bloom_positions(value, len(array) * 8))
+
+
+# --- Manifiesto ---
+def _manifest_path() -> Path:
+    return ARCHIVE_DIR / MANIFEST_NAME
+
+
+def segments() -> list:
+    """Segmentos del manifiesto. Se relee si otro proceso (manage.py) lo cambió."""
+    path = _manifest_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    with _lock:
+        if _manifest["mtime"] != mtime:
+            _manifest["segments"] = json.loads(path.read_text(encoding="utf-8"))["segments"]
+            _manifest["mtime"] = mtime
+        return _manifest["segments"]
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_segments(day: date, docs_by_kind: dict) -> list:
+    """
+    Escribe un segmento por tipo ({"orders": [...], "receipts": [...]}) y
+    los agrega al manifiesto. Devuelve las entradas nuevas.
+    """
+    existing = segments()
+    entries = []
+    for kind, docs in docs_by_kind.items():
+        if not docs: continue
+        id_field, date_field = KINDS[kind]
+        part = 1 + sum(1 for s in existing + entries if s["kind"] == kind and s["day"] == day.isoformat())
+        data, ext = _compress(b"".join(_encode(d) + b"\n" for d in docs))
+        relative = f"{day:%Y/%m}/{kind}-{day.isoformat()}-{part}.ndjson.{ext}"
+        _write_atomic(ARCHIVE_DIR / relative, data)
+        ids = [d[id_field] for d in docs]
+        dates = [d[date_field] for d in docs if d.get(date_field)]
+        entry = {"kind": kind, "day": day.isoformat(), "file": relative, "count": len(docs), "bytes": len(data),
+                 "min_id": min(ids), "max_id": max(ids),
+                 "start": min(dates).isoformat() if dates else None, "end": max(dates).isoformat() if dates else None}
+        if kind == "orders":
+            entry["users"] = _bloom(d.get("user_id") for d in docs)
+        entries.append(entry)
+
+    # El manifiesto se reemplaza de una vez: los lectores ven los segmentos completos o nada
+    manifest = {"segments": existing + entries}
+    _write_atomic(_manifest_path(), json.dumps(manifest, indent=1).encode("utf-8"))
+    return entries
+
+
+# --- Lectura ---
+def read_segment(entry: dict) -> list:
+    with _lock:
+        if entry["file"] in _cache:
+            _cache.move_to_end(entry["file"])
+            return _cache[entry["file"]]
+    docs = [_decode(line) for line in _decompress(ARCHIVE_DIR / entry["file"]).splitlines() if line]
+    with _lock:
+        _cache[entry["file"]] = docs
+        while len(_cache) > CACHE_SEGMENTS:
+            _cache.popitem(last=False)
+    return docs
+
+
+def _find(kind: str, match, order_id: int = None, user_id: int = None) -> list:
+    """Documentos que cumplen 'match', abriendo solo los segmentos que pueden tenerlos."""
+    found = {}
+    for entry in segments():
+        if entry["kind"] != kind: continue
+        if order_id is not None and not entry["min_id"] <= order_id <= entry["max_id"]: continue
+        if user_id is not None and not _bloom_contains(entry["users"], user_id): continue
+        for doc in read_segment(entry):
+            if match(doc):
+                # Copia: el segmento queda en caché. Un documento archivado dos veces cuenta
+                # una vez; se distingue por su propio id (un pedido puede tener varias boletas)
+                found[(doc.get("id"), doc[KINDS[kind][0]])] = dict(doc)
+    return list(found.values())
+
+
+async def find_order(order_id: int):
+    found = await asyncio.to_thread(_find, "orders", lambda d: d["id"] == order_id, order_id=order_id)
+    return found[0] if found else None
+
+
+async def find_orders_by_user(user_id: int) -> list:
+    return await asyncio.to_thread(_find, "orders", lambda d: d.get("user_id") == user_id, user_id=user_id)
+
+
+async def find_receipt(order_id: int):
+    found = await asyncio.to_thread(_find, "receipts", lambda d: d.get("order_id") == order_id, order_id=order_id)
+    return found[0] if found else None
+
+
+def archived_ids(kind: str, day: date) -> set:
+    """Ids de pedido ya archivados ese día (para no archivarlos dos veces)."""
+    id_field = KINDS[kind][0]
+    return {doc[id_field] for entry in segments() if entry["kind"] == kind and entry["day"] == day.isoformat()
+            for doc in read_segment(entry)}
+
+
+async def iter_segments(kind: str, desde: datetime = None, hasta: datetime = None):
+    """Documentos archivados de un tipo con fecha en [desde, hasta): una lista por segmento."""
+    date_field = KINDS[kind][1]
+    for entry in segments():
+        if entry["kind"] != kind: continue
+        if desde and entry["end"] and datetime.fromisoformat(entry["end"]) < desde: continue
+        if hasta and entry["start"] and datetime.fromisoformat(entry["start"]) >= hasta: continue
+        docs = await asyncio.to_thread(read_segment, entry)
+        if desde or hasta:
+            docs = [d for d in docs if d.get(date_field)
+                    and (not desde or d[date_field] >= desde) and (not hasta or d[date_field] < hasta)]
+        if docs:
+            yield docs
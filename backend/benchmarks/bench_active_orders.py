@@ -0,0 +1,76 @@
+"""
+Benchmark de la vista de pedidos activos (cocina y delivery).
+
+Compara, con pedidos generados por datagen:
+  - listado:  GET /api/orders/?estado=pendiente,preparando&limit=500 (Mongo)
+  - active:   GET /api/orders/active?estado=pendiente,preparando (memoria)
+  - active 304: lo mismo con If-None-Match (las pantallas sin cambios)
+  - vista:    database.get_active_orders() en proceso, sin HTTP
+    python benchmarks/bench_active_orders.py
+"""
+import asyncio
+import time
+
+from common import percentil, usar_mongomock
+
+usar_mongomock()
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+import datagen  # noqa: E402
+import main  # noqa: E402
+
+PEDIDOS = 20_000
+# Pedidos recientes que siguen activos (datagen deja activos los de la última hora)
+ACTIVOS_EXTRA = 300
+REPETICIONES = 200
+
+
+async def medir(fn):
+    valores = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        await fn()
+        valores.append((time.perf_counter() - inicio) * 1000)
+    return percentil(valores, 50), percentil(valores, 95)
+
+
+async def correr():
+    print(await datagen.generar(PEDIDOS, reset=True))
+    async with main.app.router.lifespan_context(main.app):
+        # Más pedidos en cocina para que el listado tenga volumen
+        platos = [d["id"] for d in await database.get_all_dishes()]
+        for i in range(ACTIVOS_EXTRA):
+            await database.create_order(2 + i % 100, [{"productId": platos[i % len(platos)], "productName": "x",
+                                                       "quantity": 1, "priceAtPurchase": 1000}],
+                                        1000, "pendiente", "Efectivo", "Calle 1")
+        token = await database.create_session(1)
+        headers = {"Authorization": f"Bearer {token}"}
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            r = await client.get("/api/orders/active?estado=pendiente,preparando")
+            etag = r.headers["etag"]
+            print(f"{len(r.json())} pedidos activos en cocina, {PEDIDOS + ACTIVOS_EXTRA} en total\n")
+
+            async def listado():
+                assert (await client.get("/api/orders/?estado=pendiente,preparando&limit=500")).status_code == 200
+
+            async def active():
+                assert (await client.get("/api/orders/active?estado=pendiente,preparando")).status_code == 200
+
+            async def active_304():
+                r = await client.get("/api/orders/active?estado=pendiente,preparando", headers={"If-None-Match": etag})
+                assert r.status_code == 304
+
+            async def vista():
+                await database.get_active_orders(("pendiente", "preparando"))
+
+            print(f"{'modo':<12} | {'p50 ms':>8} | {'p95 ms':>8}")
+            for nombre, fn in [("listado", listado), ("active", active), ("active 304", active_304), ("vista", vista)]:
+                p50, p95 = await medir(fn)
+                print(f"{nombre:<12} | {p50:>8.3f} | {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(correr())
@@ -0,0 +1,82 @@
+"""
+Benchmark del archivo de pedidos terminados.
+
+Genera pedidos de 90 días, archiva los de más de 30 y reporta:
+  - cuántos pedidos quedan en Mongo y el tamaño BSON archivado vs. en disco
+  - latencia de GET /api/orders/{id} para un pedido en Mongo y uno archivado
+    (primera lectura del segmento y con el segmento ya en caché)
+  - latencia de /history de un cliente con pedidos archivados
+    python benchmarks/bench_archive.py
+"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from common import percentil, usar_mongomock
+
+usar_mongomock()
+
+import bson  # noqa: E402
+import httpx  # noqa: E402
+
+import archive  # noqa: E402
+import database  # noqa: E402
+import datagen  # noqa: E402
+import main  # noqa: E402
+
+PEDIDOS = 40_000
+DIAS = 90
+ARCHIVAR_DIAS = 30
+REPETICIONES = 50
+
+
+async def latencias(client, url, headers=None, antes=None):
+    valores = []
+    for _ in range(REPETICIONES):
+        if antes: antes()
+        inicio = time.perf_counter()
+        r = await client.get(url, headers=headers)
+        valores.append((time.perf_counter() - inicio) * 1000)
+        assert r.status_code == 200, r.status_code
+    return f"p50 {percentil(valores, 50):6.1f} ms | p95 {percentil(valores, 95):6.1f} ms"
+
+
+async def correr():
+    archive.ARCHIVE_DIR = Path(tempfile.mkdtemp(prefix="archive-bench-"))
+    print(f"Generando {PEDIDOS} pedidos en {DIAS} días...")
+    print(await datagen.generar(PEDIDOS, dias=DIAS, reset=True))
+
+    bson_bytes = 0
+    async for o in database.orders_collection.find({}, {"_id": 0}):
+        bson_bytes += len(bson.encode(o))
+    inicio = time.perf_counter()
+    totales = await database.archive_orders(ARCHIVAR_DIAS)
+    segundos = time.perf_counter() - inicio
+    quedan = await database.orders_collection.count_documents({})
+    async for o in database.orders_collection.find({}, {"_id": 0}):
+        bson_bytes -= len(bson.encode(o))
+    en_disco = sum(s["bytes"] for s in archive.segments())
+    print(f"\nArchivados {totales['orders']} pedidos y {totales['receipts']} boletas en "
+          f"{totales['segments']} segmentos ({segundos:.1f} s); quedan {quedan} pedidos en Mongo")
+    print(f"Pedidos archivados: {bson_bytes / 1e6:.1f} MB en BSON -> {en_disco / 1e6:.1f} MB en disco "
+          f"(pedidos + boletas)\n")
+
+    vivo = await database.orders_collection.find_one({}, {"id": 1}, sort=[("id", -1)])
+    archivado = archive.read_segment(archive.segments()[0])[0]
+    async with main.app.router.lifespan_context(main.app):
+        token = await database.create_session(archivado["user_id"])
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            url_vivo, url_archivado = f"/api/orders/{vivo['id']}", f"/api/orders/{archivado['id']}"
+            print(f"{'pedido en Mongo':<36} | {await latencias(client, url_vivo)}")
+            print(f"{'pedido archivado (sin caché)':<36} | "
+                  f"{await latencias(client, url_archivado, antes=archive._cache.clear)}")
+            print(f"{'pedido archivado (segmento en caché)':<36} | {await latencias(client, url_archivado)}")
+            headers = {"Authorization": f"Bearer {token}"}
+            print(f"{'historial con archivados (caché)':<36} | "
+                  f"{await latencias(client, '/api/orders/history', headers)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(correr())
@@ -0,0 +1,60 @@
+"""
+Benchmark del costo de autenticación por request.
+
+'antes': get_user_by_token con dos consultas secuenciales (sesión y
+usuario) en cada request. 'después': dependencia get_current_user con la
+caché de tokens y resolución en una consulta cuando hay miss.
+"""
+import time
+
+from common import QueryCounter, usar_mongomock
+
+usar_mongomock()
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+
+REQUESTS = 2_000
+ENDPOINTS = ["/api/auth/me", "/api/products/stats"]
+
+
+async def get_user_by_token_legacy(token):
+    session = await database.sessions_collection.find_one({"token": token})
+    if session:
+        user = await database.users_collection.find_one({"id": session["user_id"]})
+        if user:
+            user.pop("_id")
+            return user
+    return None
+
+
+def correr(client, headers, endpoint):
+    with QueryCounter() as qc:
+        inicio = time.perf_counter()
+        for _ in range(REQUESTS):
+            assert client.get(endpoint, headers=headers).status_code == 200
+        total_ms = (time.perf_counter() - inicio) * 1000
+    return qc.total / REQUESTS, total_ms / REQUESTS
+
+
+def main_bench():
+    with TestClient(main.app) as client:
+        token = client.portal.call(database.create_session, 1)
+        headers = {"Authorization": f"Bearer {token}"}
+        # Calentar el snapshot del menú para que /products/stats no consulte Mongo
+        client.portal.call(database.get_menu_snapshot)
+
+        actual = database.get_user_by_token
+        print(f"{'endpoint':<22} | {'modo':<8} | {'consultas/req':>13} | {'ms/req':>7}")
+        for endpoint in ENDPOINTS:
+            for nombre, fn in [("antes", get_user_by_token_legacy), ("despues", actual)]:
+                database.get_user_by_token = fn
+                consultas, ms = correr(client, headers, endpoint)
+                print(f"{endpoint:<22} | {nombre:<8} | {consultas:>13.2f} | {ms:>7.3f}")
+        database.get_user_by_token = actual
+
+
+if __name__ == "__main__":
+    main_bench()
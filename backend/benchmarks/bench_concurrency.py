@@ -0,0 +1,70 @@
+"""
+Prueba de carga de concurrencia: handlers síncronos vs asíncronos.
+
+Sin argumentos simula una latencia de Mongo de LATENCIA_MS en una app
+mínima: la ruta 'def' bloquea un hilo del threadpool de Starlette (40 por
+defecto) mientras espera, la ruta 'async def' no. Con --url se mide la
+API real ya levantada (uvicorn main:app) con el mismo patrón de carga:
+    python benchmarks/bench_concurrency.py --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+LATENCIA_MS = 20
+CONCURRENCIAS = [10, 40, 100, 400]
+REQUESTS_POR_CLIENTE = 5
+
+
+def app_simulada():
+    app = FastAPI()
+
+    @app.get("/sync")
+    def ruta_sync():
+        time.sleep(LATENCIA_MS / 1000)  # como una consulta con MongoClient
+        return {"ok": True}
+
+    @app.get("/async")
+    async def ruta_async():
+        await asyncio.sleep(LATENCIA_MS / 1000)  # como una consulta con AsyncMongoClient
+        return {"ok": True}
+
+    return app
+
+
+async def carga(client, path, concurrencia):
+    async def cliente():
+        for _ in range(REQUESTS_POR_CLIENTE):
+            r = await client.get(path)
+            r.raise_for_status()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[cliente() for _ in range(concurrencia)])
+    segundos = time.perf_counter() - inicio
+    return concurrencia * REQUESTS_POR_CLIENTE / segundos
+
+
+async def main(url):
+    print(f"{'ruta':<28} | {'concurrencia':>12} | {'req/s':>8}")
+    if url:
+        limits = httpx.Limits(max_connections=max(CONCURRENCIAS))
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            for path in ["/api/menu", "/api/orders/?limit=20"]:
+                for c in CONCURRENCIAS:
+                    print(f"{path:<28} | {c:>12} | {await carga(client, path, c):>8.0f}")
+        return
+
+    transport = httpx.ASGITransport(app=app_simulada())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ["/sync", "/async"]:
+            for c in CONCURRENCIAS:
+                print(f"{path:<28} | {c:>12} | {await carga(client, path, c):>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="URL de la API levantada (por defecto: simulación en proceso)")
+    asyncio.run(main(parser.parse_args().url))
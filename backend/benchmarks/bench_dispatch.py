@@ -0,0 +1,118 @@
+"""
+Simulación de despacho de repartidores (sin Mongo ni HTTP).
+
+Compara, con la misma secuencia de pedidos listos, tres políticas:
+  - azar:   cada pedido a random.choice(repartidores) apenas está listo, sin
+            mirar su carga (la política anterior del scheduler)
+  - carga:  dispatch.assign por lotes, cada pedido al de menor carga
+  - zona:   dispatch.assign por lotes, agrupando pedidos de la misma zona
+
+Modelo (minutos): un repartidor sale del local con sus pedidos (hasta
+DRIVER_CAPACITY), los entrega en orden de zona y vuelve. Mientras está
+fuera cuenta como lleno. Reporta pedidos entregados por hora, espera en el
+local (listo -> sale) y tiempo hasta la entrega, en hora normal y en pico.
+    python benchmarks/bench_dispatch.py
+"""
+import random
+
+from common import percentil
+
+import dispatch  # noqa: E402
+
+SEMILLA = 7
+HORAS = 4
+PASO = 0.5           # minutos por paso de simulación
+LOTE_CADA = 1.0      # minutos entre lotes (DISPATCH_INTERVAL de la simulación)
+ENTREGA = 3          # minutos por parada en la misma zona
+CRUCE = 7            # minutos entre zonas distintas
+# Distrito -> (minutos desde el local, peso en los pedidos)
+ZONAS = {"Miraflores": (8, 5), "San Isidro": (10, 4), "Barranco": (12, 3),
+         "Surco": (15, 3), "Lince": (9, 2), "San Borja": (13, 2)}
+# (nombre, pedidos por minuto fuera del pico, pedidos por minuto en la hora pico)
+ESCENARIOS = [("normal", 0.2, 0.3), ("pico", 0.25, 0.6)]
+
+
+def generar_pedidos(normal: float, pico: float) -> list:
+    rng = random.Random(SEMILLA)
+    zonas, pesos = list(ZONAS), [p for _, p in ZONAS.values()]
+    pedidos, t = [], 0.0
+    while True:
+        # La segunda hora es la hora pico
+        t += rng.expovariate(pico if 60 <= t < 120 else normal)
+        if t >= HORAS * 60:
+            return pedidos
+        zona = rng.choices(zonas, pesos)[0]
+        pedidos.append({"id": len(pedidos) + 1, "listo": t,
+                        "delivery_address": f"Calle {rng.randint(1, 300)} #{rng.randint(100, 999)}, {zona}"})
+
+
+def ruta(pedidos: list, salida: float) -> float:
+    """Entrega los pedidos (anota 'entregado') y devuelve la hora de regreso al local."""
+    pedidos.sort(key=lambda p: ZONAS[p["delivery_address"].rsplit(", ", 1)[1]][0])
+    t, zona = salida, None
+    for p in pedidos:
+        z = p["delivery_address"].rsplit(", ", 1)[1]
+        t += ZONAS[z][0] if zona is None else (ENTREGA if z == zona else CRUCE)
+        p["sale"], p["entregado"], zona = salida, t, z
+    return t + ZONAS[zona][0]
+
+
+def simular(pedidos: list, politica: str) -> dict:
+    pedidos = [dict(p) for p in pedidos]
+    repartidores = dispatch.REPARTIDORES
+    capacidad = dispatch.DRIVER_CAPACITY
+    rng = random.Random(SEMILLA)
+    en_local = {r: 0.0 for r in repartidores}   # hora a la que vuelve al local
+    colas = {r: [] for r in repartidores}        # solo 'azar': pedidos asignados esperando
+    espera, siguiente, t, proximo_lote = [], 0, 0.0, 0.0
+
+    while siguiente < len(pedidos) or espera or any(colas.values()):
+        while siguiente < len(pedidos) and pedidos[siguiente]["listo"] <= t:
+            if politica == "azar":
+                colas[rng.choice(repartidores)].append(pedidos[siguiente])
+            else:
+                espera.append(pedidos[siguiente])
+            siguiente += 1
+
+        if politica != "azar" and t >= proximo_lote:
+            proximo_lote = t + LOTE_CADA
+            cargas = {r: 0 if en_local[r] <= t else capacidad for r in repartidores}
+            por_id = {p["id"]: p for p in espera}
+            for order_id, r in dispatch.assign(espera, cargas, by_zone=politica == "zona"):
+                colas[r].append(por_id.pop(order_id))
+            espera = [p for p in espera if p["id"] in por_id]
+
+        for r in repartidores:
+            if colas[r] and en_local[r] <= t:
+                salen, colas[r] = colas[r][:capacidad], colas[r][capacidad:]
+                en_local[r] = ruta(salen, t)
+                for p in salen: p["repartidor"] = r
+        t += PASO
+
+    esperas = [p["sale"] - p["listo"] for p in pedidos]
+    totales = [p["entregado"] - p["listo"] for p in pedidos]
+    por_repartidor = [sum(1 for p in pedidos if p["repartidor"] == r) for r in repartidores]
+    fin = max(p["entregado"] for p in pedidos)
+    return {"por_hora": len(pedidos) / (fin / 60), "fin": fin,
+            "espera_p50": percentil(esperas, 50), "espera_p95": percentil(esperas, 95),
+            "total_p50": percentil(totales, 50), "total_p95": percentil(totales, 95),
+            "reparto": f"{min(por_repartidor)}-{max(por_repartidor)}"}
+
+
+def correr():
+    print(f"{len(dispatch.REPARTIDORES)} repartidores, capacidad {dispatch.DRIVER_CAPACITY}, "
+          f"{HORAS} h simuladas (pico en la segunda hora)\n")
+    print(f"{'escenario':<9} | {'política':<6} | {'ent/h':>6} | {'fin min':>7} | {'espera p50':>10} | "
+          f"{'espera p95':>10} | {'total p50':>9} | {'total p95':>9} | {'por repartidor':>14}")
+    for nombre, normal, pico in ESCENARIOS:
+        pedidos = generar_pedidos(normal, pico)
+        for politica in ("azar", "carga", "zona"):
+            r = simular(pedidos, politica)
+            print(f"{nombre:<9} | {politica:<6} | {r['por_hora']:>6.1f} | {r['fin']:>7.0f} | "
+                  f"{r['espera_p50']:>10.1f} | {r['espera_p95']:>10.1f} | {r['total_p50']:>9.1f} | "
+                  f"{r['total_p95']:>9.1f} | {r['reparto']:>14}")
+        print(f"{'':<9} | {len(pedidos)} pedidos")
+
+
+if __name__ == "__main__":
+    correr()
@@ -0,0 +1,115 @@
+"""
+Benchmark de memoria de la exportación para contabilidad.
+
+Para rangos con cada vez más pedidos compara el pico de memoria (tracemalloc)
+de:
+  - lista:     leer todo con to_list y serializar de una vez (como el listado)
+  - streaming: GET /api/admin/export/orders consumido por trozos
+  - cursor:    solo recorrer el cursor, sin serializar ni enviar
+mongomock ordena y copia todo el resultado al crear el cursor (un mongod
+real no), así que se reporta también el pico menos el de 'cursor': lo que
+agrega la API. En 'lista' crece con el rango; en 'streaming' queda acotado
+por EXPORT_BATCH_SIZE.
+    python benchmarks/bench_export.py
+"""
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from common import usar_mongomock
+
+usar_mongomock()
+
+import database  # noqa: E402
+import datagen  # noqa: E402
+import main  # noqa: E402
+from responses import dumps  # noqa: E402
+
+PEDIDOS = 40_000
+DIAS = 90
+RANGOS_DIAS = [7, 30, 90]
+
+
+async def cursor(desde, hasta):
+    n = 0
+    async for batch in database.iter_export_batches("orders", desde, hasta):
+        n += len(batch)
+    return n
+
+
+async def lista(desde, hasta):
+    docs = await database.orders_collection.find(
+        {"created_at": {"$gte": desde, "$lt": hasta}}, {"_id": 0}).sort("created_at", 1).to_list(None)
+    return len(b"".join(dumps(d) + b"\n" for d in docs))
+
+
+async def streaming(token, desde, hasta, formato):
+    # Llamada ASGI directa: httpx.ASGITransport junta todo el cuerpo antes
+    # de devolverlo, aquí cada trozo se cuenta y se descarta
+    total = 0
+    status = None
+    query = urlencode({"desde": desde.isoformat(), "hasta": hasta.isoformat(), "format": formato})
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/api/admin/export/orders", "raw_path": b"/api/admin/export/orders", "root_path": "",
+             "query_string": query.encode(), "headers": [(b"authorization", f"Bearer {token}".encode())],
+             "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+
+    enviado = asyncio.Event()
+    pedidos = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if pedidos:
+            return pedidos.pop()
+        await enviado.wait()  # el cliente "se desconecta" al terminar la respuesta
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal total, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            total += len(message.get("body", b""))
+            if not message.get("more_body"):
+                enviado.set()
+
+    await main.app(scope, receive, send)
+    assert status == 200, status
+    return total
+
+
+async def medir_pico(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    tamano = await fn()
+    ms = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tamano, ms, pico
+
+
+async def correr():
+    print(f"Generando {PEDIDOS} pedidos en {DIAS} días...")
+    print(await datagen.generar(PEDIDOS, dias=DIAS, reset=True))
+    async with main.app.router.lifespan_context(main.app):
+        token = await database.create_session(1)
+        hasta = datetime.now() + timedelta(minutes=1)
+        print(f"\n{'días':>5} | {'pedidos':>8} | {'modo':<16} | {'MB salida':>9} | {'ms':>8} | "
+              f"{'pico MB':>8} | {'- cursor':>8}")
+        for dias in RANGOS_DIAS:
+            desde = hasta - timedelta(days=dias)
+            n = await database.orders_collection.count_documents({"created_at": {"$gte": desde, "$lt": hasta}})
+            _, _, base = await medir_pico(lambda: cursor(desde, hasta))
+            modos = [("lista", lambda: lista(desde, hasta)),
+                     ("streaming ndjson", lambda: streaming(token, desde, hasta, "ndjson")),
+                     ("streaming csv", lambda: streaming(token, desde, hasta, "csv"))]
+            for nombre, fn in modos:
+                tamano, ms, pico = await medir_pico(fn)
+                print(f"{dias:>5} | {n:>8} | {nombre:<16} | {tamano / 1e6:>9.1f} | {ms:>8.0f} | "
+                      f"{pico / 1e6:>8.1f} | {(pico - base) / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(correr())
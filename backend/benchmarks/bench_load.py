@@ -0,0 +1,244 @@
+"""
+Prueba de carga en proceso con la mezcla de tráfico de las páginas.
+
+Usuarios virtuales recorren los flujos del frontend (catálogo, portada,
+checkout, historial y administración) y las pantallas de cocina consultan
+sus dos listados cada --kitchen-interval segundos. Reporta p50/p95/p99 y
+throughput por endpoint y guarda el resultado en JSON para comparar corridas.
+
+Contra mongomock (genera los datos en memoria en cada corrida):
+    python benchmarks/bench_load.py --mongomock --orders 10000 --users 50 --duration 30
+Contra un mongod local (datos de benchmarks/datagen.py en MONGO_DB):
+    MONGO_DB=sabor_bench python benchmarks/datagen.py --orders 1000000 --reset
+    MONGO_DB=sabor_bench python benchmarks/bench_load.py --users 200 --duration 60
+Comparar con una corrida anterior:
+    python benchmarks/bench_load.py --mongomock --compare benchmarks/resultados/load-XXXX.json
+
+La API y los clientes comparten el event loop: las cifras sirven para
+comparar corridas entre sí, no como capacidad de un servidor real.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import common
+from common import percentil
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+# Flujos de las páginas y su peso en la mezcla
+ESCENARIOS = {
+    "catalogo": 35,   # catalogo.html: sesión + menú (revalidado con ETag)
+    "portada": 20,    # index.html: sesión + más vendidos
+    "checkout": 15,   # carrito.html -> pedido.html
+    "historial": 10,  # pedido.html: historial del cliente
+    "admin": 5,       # administracion.html y reporte.html
+}
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.midiendo = False
+
+    def registrar(self, nombre, ms, ok):
+        if not self.midiendo:
+            return
+        self.latencias[nombre].append(ms)
+        if not ok:
+            self.errores[nombre] += 1
+
+    def resumen(self, segundos):
+        endpoints = {}
+        for nombre, valores in sorted(self.latencias.items()):
+            endpoints[nombre] = {
+                "count": len(valores), "errors": self.errores[nombre], "rps": round(len(valores) / segundos, 1),
+                "p50_ms": round(percentil(valores, 50), 2), "p95_ms": round(percentil(valores, 95), 2),
+                "p99_ms": round(percentil(valores, 99), 2), "mean_ms": round(sum(valores) / len(valores), 2),
+                "max_ms": round(max(valores), 2),
+            }
+        todas = [v for valores in self.latencias.values() for v in valores]
+        total = {"count": len(todas), "errors": sum(self.errores.values()), "rps": round(len(todas) / segundos, 1)}
+        if todas:
+            total.update({"p50_ms": round(percentil(todas, 50), 2), "p95_ms": round(percentil(todas, 95), 2),
+                          "p99_ms": round(percentil(todas, 99), 2)})
+        return endpoints, total
+
+
+class UsuarioVirtual:
+    def __init__(self, client, resultados, token, platos, periodo, rng):
+        self.client = client
+        self.resultados = resultados
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.platos = platos
+        self.periodo = periodo
+        self.rng = rng
+        self.etag_menu = None
+
+    async def pedir(self, nombre, method, url, auth=True, **kwargs):
+        headers = dict(self.headers) if auth else {}
+        headers.update(kwargs.pop("headers", {}))
+        inicio = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            # 404 es una respuesta válida del frontend (ej: reporte sin datos)
+            ok = response.status_code < 400 or response.status_code == 404
+        except Exception:
+            response, ok = None, False
+        self.resultados.registrar(nombre, (time.perf_counter() - inicio) * 1000, ok)
+        return response
+
+    async def menu(self):
+        extra = {"If-None-Match": self.etag_menu} if self.etag_menu else {}
+        response = await self.pedir("GET /api/menu", "GET", "/api/menu", auth=False, headers=extra)
+        if response is not None and response.status_code == 200:
+            self.etag_menu = response.headers.get("etag")
+
+    async def catalogo(self):
+        await self.pedir("GET /api/auth/me", "GET", "/api/auth/me")
+        await self.menu()
+
+    async def portada(self):
+        await self.pedir("GET /api/auth/me", "GET", "/api/auth/me")
+        await self.pedir("GET /api/menu/top", "GET", "/api/menu/top", auth=False)
+
+    async def checkout(self):
+        await self.pedir("GET /api/auth/me", "GET", "/api/auth/me")
+        await self.menu()
+        carrito = [{"productId": p, "quantity": self.rng.choice([1, 1, 2])}
+                   for p in self.rng.sample(self.platos, k=self.rng.randint(1, 4))]
+        await self.pedir("POST /api/orders/", "POST", "/api/orders/", json={
+            "items": carrito, "paymentMethod": "Tarjeta", "deliveryAddress": "Av. Benchmark 123"})
+        await self.pedir("GET /api/orders/current", "GET", "/api/orders/current")
+
+    async def historial(self):
+        await self.pedir("GET /api/auth/me", "GET", "/api/auth/me")
+        await self.pedir("GET /api/orders/history", "GET", "/api/orders/history")
+
+    async def admin(self):
+        await self.pedir("GET /api/auth/me", "GET", "/api/auth/me")
+        await self.pedir("GET /api/admin/dashboard", "GET", "/api/admin/dashboard")
+        await self.pedir("GET /api/orders/active", "GET", "/api/orders/active?estado=pendiente,preparando")
+        await self.pedir("GET /api/reports/metrics", "GET", f"/api/reports/metrics?period={self.periodo}")
+        await self.pedir("GET /api/reports/top-products", "GET", f"/api/reports/top-products?period={self.periodo}")
+
+    async def cocina(self):
+        await asyncio.gather(
+            self.pedir("GET /api/orders/active (cocina)", "GET", "/api/orders/active?estado=pendiente,preparando"),
+            self.pedir("GET /api/orders?cocina=historial", "GET",
+                       "/api/orders/?estado=completado,en_ruta,entregado,anulado&limit=50"),
+        )
+
+
+async def correr(args):
+    import httpx
+    import database
+    import main as app_main
+
+    if args.mongomock:
+        import datagen
+        print(f"Generando {args.orders} pedidos en mongomock...")
+        print(await datagen.generar(args.orders, seed=args.seed, reset=True))
+
+    async with app_main.app.router.lifespan_context(app_main.app):
+        admin = await database.users_collection.find_one({"role": "admin"}, {"id": 1})
+        clientes = [u["id"] async for u in database.users_collection.find({"role": "cliente"}, {"id": 1}).limit(1000)]
+        if not admin or not clientes:
+            raise SystemExit("No hay datos: generar primero con benchmarks/datagen.py (o usar --mongomock)")
+        platos = [d["id"] for d in await database.get_all_dishes()]
+        admin_token = await database.create_session(admin["id"])
+        tokens = [await database.create_session(uid) for uid in clientes[:args.users]]
+        periodo = datetime.now().strftime("%Y-%m")
+
+        resultados = Resultados()
+        rng = random.Random(args.seed)
+        escenarios, pesos = zip(*ESCENARIOS.items())
+        transport = httpx.ASGITransport(app=app_main.app)
+        limits = httpx.Limits(max_connections=args.users + args.kitchens * 2)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=60) as client:
+            fin = time.monotonic() + args.warmup + args.duration
+
+            async def usuario(i):
+                vu_rng = random.Random(rng.random())
+                vu = UsuarioVirtual(client, resultados, tokens[i % len(tokens)], platos, periodo, vu_rng)
+                admin_vu = UsuarioVirtual(client, resultados, admin_token, platos, periodo, vu_rng)
+                while time.monotonic() < fin:
+                    escenario = vu_rng.choices(escenarios, pesos)[0]
+                    await getattr(admin_vu if escenario == "admin" else vu, escenario)()
+                    if args.think:
+                        await asyncio.sleep(vu_rng.expovariate(1 / args.think))
+
+            async def cocina():
+                vu = UsuarioVirtual(client, resultados, admin_token, platos, periodo, rng)
+                while time.monotonic() < fin:
+                    inicio = time.monotonic()
+                    await vu.cocina()
+                    await asyncio.sleep(max(0, args.kitchen_interval - (time.monotonic() - inicio)))
+
+            async def medir():
+                await asyncio.sleep(args.warmup)
+                resultados.midiendo = True
+
+            tareas = [usuario(i) for i in range(args.users)] + [cocina() for _ in range(args.kitchens)]
+            await asyncio.gather(medir(), *tareas)
+    return resultados.resumen(args.duration)
+
+
+def imprimir(endpoints, total, anterior=None):
+    print(f"\n{'endpoint':<36} | {'req':>6} | {'err':>4} | {'req/s':>7} | {'p50':>7} | {'p95':>7} | {'p99':>7}")
+    filas = list(endpoints.items()) + [("TOTAL", total)]
+    for nombre, e in filas:
+        linea = (f"{nombre:<36} | {e['count']:>6} | {e['errors']:>4} | {e['rps']:>7.1f} | "
+                 f"{e.get('p50_ms', 0):>7.1f} | {e.get('p95_ms', 0):>7.1f} | {e.get('p99_ms', 0):>7.1f}")
+        previo = (anterior or {}).get("total" if nombre == "TOTAL" else "endpoints", {})
+        previo = previo if nombre == "TOTAL" else previo.get(nombre)
+        if previo and previo.get("p95_ms"):
+            linea += (f"   p95 {(e.get('p95_ms', 0) / previo['p95_ms'] - 1) * 100:+.0f}%"
+                      f", req/s {(e['rps'] / previo['rps'] - 1) * 100 if previo['rps'] else 0:+.0f}%")
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongomock", action="store_true", help="Mongo en memoria (por defecto MONGO_URI/MONGO_DB)")
+    parser.add_argument("--orders", type=int, default=10_000, help="pedidos a generar con --mongomock")
+    parser.add_argument("--users", type=int, default=50, help="usuarios virtuales concurrentes")
+    parser.add_argument("--kitchens", type=int, default=2, help="pantallas de cocina")
+    parser.add_argument("--kitchen-interval", type=float, default=5, help="segundos entre consultas de cocina")
+    parser.add_argument("--think", type=float, default=0.1, help="pausa media entre flujos (s)")
+    parser.add_argument("--duration", type=float, default=30, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=3, help="segundos sin medir al inicio")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="archivo JSON (por defecto benchmarks/resultados/load-<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        common.usar_mongomock()
+    endpoints, total = asyncio.run(correr(args))
+
+    anterior = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(endpoints, total, anterior)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    resultado = {"fecha": datetime.now().isoformat(timespec="seconds"),
+                 "backend": "mongomock" if args.mongomock else os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+                 "config": config, "endpoints": endpoints, "total": total}
+    out = args.out or os.path.join(RESULTADOS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\nResultado guardado en {out}")
+
+
+if __name__ == "__main__":
+    main()
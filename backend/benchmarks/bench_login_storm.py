@@ -0,0 +1,97 @@
+"""
+Benchmark de "tormenta de logins": latencia del resto de la API mientras
+muchos clientes inician sesión a la vez.
+
+  - sin_logins:  solo el tráfico normal (menú, /me y listado de pedidos)
+  - en_el_loop:  logins con el hash calculado en el event loop (ingenuo)
+  - pool:        logins con passwords.py (pool de hilos acotado)
+Reporta p50/p95/p99 del tráfico normal y logins por segundo. Cada cliente
+normal tiene un horario fijo (una petición cada INTERVALO_MS) y la latencia
+se mide desde la hora programada: si el event loop está bloqueado, la
+espera para poder enviar también cuenta.
+    python benchmarks/bench_login_storm.py
+"""
+import asyncio
+import os
+import time
+
+from common import percentil, usar_mongomock
+
+usar_mongomock()
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import passwords  # noqa: E402
+
+CLIENTES_NORMALES = 10
+CLIENTES_LOGIN = 20
+SEGUNDOS = 5
+INTERVALO_MS = 20
+PASSWORD = "bench1234"
+RUTAS = ["/api/menu", "/api/auth/me", "/api/orders/?limit=20"]
+
+
+async def en_el_loop(stored, password):
+    return passwords.verify_sync(stored, password)
+
+
+async def escenario(client, token, logins: bool):
+    latencias = []
+    total_logins = 0
+    fin = time.monotonic() + SEGUNDOS
+
+    async def normal(i):
+        headers = {"Authorization": f"Bearer {token}"}
+        programado = time.perf_counter()
+        n = i
+        while time.monotonic() < fin:
+            await asyncio.sleep(max(0, programado - time.perf_counter()))
+            await client.get(RUTAS[n % len(RUTAS)], headers=headers)
+            latencias.append((time.perf_counter() - programado) * 1000)
+            programado += INTERVALO_MS / 1000
+            n += 1
+
+    async def login(i):
+        nonlocal total_logins
+        while time.monotonic() < fin:
+            r = await client.post("/api/auth/login", json={"email": f"storm{i}@bench.local", "password": PASSWORD})
+            assert r.status_code == 200
+            total_logins += 1
+
+    tareas = [normal(i) for i in range(CLIENTES_NORMALES)]
+    if logins:
+        tareas += [login(i) for i in range(CLIENTES_LOGIN)]
+    await asyncio.gather(*tareas)
+    return latencias, total_logins / SEGUNDOS
+
+
+async def correr():
+    async with main.app.router.lifespan_context(main.app):
+        password_hash = await passwords.hash_password(PASSWORD)
+        primer_id = await database.get_next_sequence("userid", 1) + 1
+        await database.users_collection.insert_many([
+            {"id": primer_id + i, "nombre": f"Storm {i}", "email": f"storm{i}@bench.local",
+             "password": password_hash, "role": "cliente", "categoria": "nuevo"}
+            for i in range(CLIENTES_LOGIN)
+        ])
+        token = await database.create_session(1)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            print(f"{passwords.SCHEME}, {os.cpu_count()} CPU(s), {CLIENTES_LOGIN} clientes haciendo login, "
+                  f"{CLIENTES_NORMALES} con tráfico normal\n")
+            print(f"{'modo':<12} | {'logins/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+            verify_pool = passwords.verify_password
+            for nombre, logins, verify in [("sin_logins", False, verify_pool),
+                                           ("en_el_loop", True, en_el_loop),
+                                           ("pool", True, verify_pool)]:
+                passwords.verify_password = verify
+                latencias, logins_s = await escenario(client, token, logins)
+                print(f"{nombre:<12} | {logins_s:>8.1f} | {percentil(latencias, 50):>8.1f} | "
+                      f"{percentil(latencias, 95):>8.1f} | {percentil(latencias, 99):>8.1f}")
+            passwords.verify_password = verify_pool
+
+
+if __name__ == "__main__":
+    asyncio.run(correr())
@@ -0,0 +1,157 @@
+"""
+Benchmark de /api/menu/search con un catálogo de 10k platos.
+
+Reporta:
+  - construcción completa del índice (menu_search.sync desde cero)
+  - latencia de búsquedas típicas: en proceso y por HTTP, contra filtrar la
+    lista completa en Python (lo que hacía el navegador con /api/menu)
+  - costo de agregar un plato al índice, de alinearlo con un snapshot
+    recargado sin cambios y de reconstruirlo completo; y crear un plato más
+    la búsqueda siguiente de punta a punta (incluye recargar el snapshot)
+    python benchmarks/bench_menu_search.py
+"""
+import asyncio
+import random
+import time
+
+from common import percentil, usar_mongomock
+
+usar_mongomock()
+
+import httpx  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+import menu_search  # noqa: E402
+
+PLATOS = 10_000
+REPETICIONES = 100
+SEMILLA = 11
+
+BASES = ["Ají de Gallina", "Lomo Saltado", "Ceviche", "Causa", "Arroz con Pollo", "Tacu Tacu", "Anticuchos",
+         "Papa a la Huancaína", "Rocoto Relleno", "Seco de Res", "Tiradito", "Suspiro a la Limeña",
+         "Picarones", "Mazamorra Morada", "Chupe de Camarones", "Pachamanca", "Juane", "Carapulcra"]
+ESTILOS = ["Clásico", "Norteño", "Arequipeño", "de la Casa", "Criollo", "Nikkei", "Chifa", "Especial"]
+INGREDIENTES = ["Pollo", "Ají Amarillo", "Nueces", "Maní", "Queso Fresco", "Leche Evaporada", "Pescado", "Limón",
+                "Camote", "Choclo", "Rocoto", "Cebolla", "Tomate", "Papa Amarilla", "Arroz", "Culantro", "Res",
+                "Camarones", "Huevo", "Pecanas", "Ajonjolí", "Sillao", "Kion", "Chancaca", "Canela", "Maíz Morado"]
+CATEGORIAS = ["entradas", "fondo", "postres", "bebidas", "Plato de Fondo", "Entrada"]
+
+# (nombre, parámetros)
+BUSQUEDAS = [
+    ("q=aji", {"q": "aji"}),
+    ("q=pol ama", {"q": "pol ama"}),
+    ("q=ceviche nikkei", {"q": "ceviche nikkei"}),
+    ("categoria+disponible", {"categorias": ["fondo"], "disponible": True}),
+    ("q=arroz sin=nueces,mani", {"q": "arroz", "sin": ["nueces", "mani"]}),
+    ("con=pollo sin=mani", {"con": ["pollo"], "sin": ["mani"]}),
+    ("sin=aji amarillo", {"sin": ["aji amarillo"]}),
+]
+
+
+def generar_platos() -> list:
+    rng = random.Random(SEMILLA)
+    platos = []
+    for i in range(1, PLATOS + 1):
+        base = rng.choice(BASES)
+        platos.append({
+            "id": i, "nombre": f"{base} {rng.choice(ESTILOS)} {i}", "precio": rng.randint(15, 80),
+            "categoria": rng.choice(CATEGORIAS), "description": f"{base} preparado al estilo {rng.choice(ESTILOS)}",
+            "ingredients": "|".join(rng.sample(INGREDIENTES, rng.randint(3, 8))),
+            "image": "https://placehold.co/600x400?text=Sin+Imagen", "disponible": rng.random() > 0.1,
+        })
+    return platos
+
+
+def filtrar_lista(platos: list, q: str = "", categorias=None, disponible=None, con=None, sin=None, **_):
+    """Filtrado lineal equivalente (substring sin tildes), como lo haría el cliente."""
+    palabras = menu_search.tokens(q)
+    resultado = []
+    for d in platos:
+        texto = menu_search.fold(" ".join([d["nombre"], d["description"], d["categoria"], d["ingredients"]]))
+        ingredientes = menu_search.fold(d["ingredients"])
+        if palabras and not all(p in texto for p in palabras): continue
+        if categorias and menu_search.fold(d["categoria"]) not in categorias: continue
+        if disponible is not None and d["disponible"] != disponible: continue
+        if con and not all(menu_search.fold(i) in ingredientes for i in con): continue
+        if sin and any(menu_search.fold(i) in ingredientes for i in sin): continue
+        resultado.append(d)
+    return resultado
+
+
+def medir(fn, repeticiones: int = REPETICIONES):
+    valores = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        valores.append((time.perf_counter() - inicio) * 1000)
+    return f"p50 {percentil(valores, 50):7.3f} ms | p95 {percentil(valores, 95):7.3f} ms"
+
+
+async def medir_async(fn, repeticiones: int = REPETICIONES):
+    valores = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        await fn()
+        valores.append((time.perf_counter() - inicio) * 1000)
+    return f"p50 {percentil(valores, 50):7.3f} ms | p95 {percentil(valores, 95):7.3f} ms"
+
+
+async def correr():
+    async with main.app.router.lifespan_context(main.app):
+        await database.dishes_collection.delete_many({})
+        platos = generar_platos()
+        await database.dishes_collection.insert_many([dict(p) for p in platos])
+        await database.counters_collection.update_one({"_id": "dishid"}, {"$set": {"sequence_value": PLATOS}}, upsert=True)
+        database.invalidate_menu_cache()
+        snapshot = await database.get_menu_snapshot()
+
+        inicio = time.perf_counter()
+        menu_search.sync(snapshot["dishes"], snapshot["version"])
+        print(f"Índice de {menu_search.size()} platos construido en {(time.perf_counter() - inicio) * 1000:.0f} ms "
+              f"({len(menu_search._vocabulary)} palabras)\n")
+
+        print(f"{'búsqueda':<26} | {'resultados':>10} | {'índice':<33} | {'filtrar la lista':<33}")
+        for nombre, filtros in BUSQUEDAS:
+            total = menu_search.search(**filtros)["total"]
+            indice = medir(lambda: menu_search.search(**filtros))
+            lista = medir(lambda: filtrar_lista(snapshot["dishes"], **filtros), 10)
+            print(f"{nombre:<26} | {total:>10} | {indice} | {lista}")
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def http_search():
+                assert (await client.get("/api/menu/search?q=pol%20ama&sin=nueces,mani")).status_code == 200
+
+            async def http_menu():
+                assert (await client.get("/api/menu")).status_code == 200
+
+            print(f"\n{'HTTP /api/menu/search':<26} | {await medir_async(http_search)}")
+            print(f"{'HTTP /api/menu (todo)':<26} | {await medir_async(http_menu, 20)}")
+
+        # Escrituras: el índice se actualiza plato a plato; al recargar el snapshot solo se compara
+        nuevo = {**platos[0], "id": PLATOS + 1, "nombre": "Ceviche Bench", "ingredients": "Pescado|Limón|Ají Limo"}
+        recargas = iter(range(REPETICIONES + 1))
+
+        def sync_sin_cambios():
+            # Versión nueva con el mismo contenido: recorre los platos pero no reindexa ninguno
+            assert menu_search.sync(snapshot["dishes"], f"recarga-{next(recargas)}") == 0
+
+        def reconstruir():
+            menu_search.sync([], None)
+            menu_search.sync(snapshot["dishes"], snapshot["version"])
+
+        async def crear_y_buscar():
+            await database.create_dish("Ceviche Bench", 30, "entradas", "Pescado fresco", "Pescado|Limón|Ají Limo")
+            await database.search_menu("ceviche bench")
+
+        print(f"\n{'agregar plato al índice':<26} | {medir(lambda: menu_search.add(nuevo))}")
+        print(f"{'disponibilidad':<26} | {medir(lambda: menu_search.set_available(1, False))}")
+        menu_search.sync(snapshot["dishes"], "recarga")  # deshace las dos pruebas anteriores
+        print(f"{'sync sin cambios':<26} | {medir(sync_sin_cambios)}")
+        print(f"{'reconstruir todo':<26} | {medir(reconstruir, 5)}")
+        print(f"{'crear plato + buscar':<26} | {await medir_async(crear_y_buscar, 10)}  (con recarga del snapshot)")
+
+
+if __name__ == "__main__":
+    asyncio.run(correr())
@@ -0,0 +1,42 @@
+"""
+Benchmark de POST /api/orders/ según el tamaño del carrito.
+
+Reporta consultas a Mongo por pedido y latencia p50/p99: con la búsqueda
+de platos en lote y los ids por bloques ambas no dependen del carrito.
+"""
+import time
+
+from common import QueryCounter, percentil, usar_mongomock
+
+usar_mongomock()
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+
+PEDIDOS = 500
+TAMANOS_CARRITO = [1, 10, 50]
+
+
+def main_bench():
+    with TestClient(main.app) as client:
+        headers = {"Authorization": f"Bearer {client.portal.call(database.create_session, 1)}"}
+        platos = [d["id"] for d in client.portal.call(database.get_all_dishes)]
+
+        print(f"{'líneas':>6} | {'consultas/pedido':>16} | {'p50 ms':>7} | {'p99 ms':>7}")
+        for n in TAMANOS_CARRITO:
+            carrito = [{"productId": platos[i % len(platos)], "quantity": 1} for i in range(n)]
+            body = {"items": carrito, "paymentMethod": "Efectivo", "deliveryAddress": "Av. Siempre Viva 123"}
+            client.post("/api/orders/", json=body, headers=headers)  # calentar cachés
+
+            latencias = []
+            with QueryCounter() as qc:
+                for _ in range(PEDIDOS):
+                    inicio = time.perf_counter()
+                    assert client.post("/api/orders/", json=body, headers=headers).status_code == 200
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+            print(f"{n:>6} | {qc.total / PEDIDOS:>16.2f} | {percentil(latencias, 50):>7.2f} | {percentil(latencias, 99):>7.2f}")
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,57 @@
+"""
+Benchmark del listado de pedidos (GET /api/orders/).
+
+Compara el formateo pedido a pedido (una consulta de usuario por pedido)
+con format_orders_response (una sola consulta $in para todo el listado).
+"""
+import asyncio
+from datetime import datetime
+
+from common import QueryCounter, medir, usar_mongomock
+
+usar_mongomock()
+
+import database  # noqa: E402
+from controllers import order_controller  # noqa: E402
+
+TAMANOS = [100, 1_000, 10_000]
+USUARIOS = 200
+
+
+async def preparar(n):
+    await database.orders_collection.delete_many({})
+    await database.users_collection.delete_many({"role": "cliente"})
+    await database.users_collection.insert_many([
+        {"id": 1000 + i, "nombre": f"Cliente {i}", "email": f"c{i}@mail.com", "role": "cliente"}
+        for i in range(USUARIOS)
+    ])
+    await database.orders_collection.insert_many([
+        {"id": i, "user_id": 1000 + (i % USUARIOS), "items": [], "total": 9990,
+         "estado": "pendiente", "created_at": datetime.now()}
+        for i in range(n)
+    ])
+
+
+async def por_pedido(orders):
+    return [await order_controller.format_order_response(o) for o in orders]
+
+
+async def por_lote(orders):
+    return await order_controller.format_orders_response(orders)
+
+
+def main():
+    print(f"{'pedidos':>8} | {'modo':<10} | {'consultas':>9} | {'ms':>9}")
+    for n in TAMANOS:
+        asyncio.run(preparar(n))
+        for nombre, fn in [("por_pedido", por_pedido), ("por_lote", por_lote)]:
+            async def ejecutar():
+                return await fn(await database.get_all_orders())
+            with QueryCounter() as qc:
+                asyncio.run(ejecutar())
+            ms = medir(ejecutar)
+            print(f"{n:>8} | {nombre:<10} | {qc.total:>9} | {ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
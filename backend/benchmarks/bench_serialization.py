@@ -0,0 +1,75 @@
+"""
+Microbenchmark de serialización de listados de pedidos ya formateados.
+
+Compara, para 1k y 10k pedidos:
+  - jsonable_encoder: lo que hacía FastAPI con los dicts (jsonable_encoder + json.dumps)
+  - response_model:   validación Pydantic de List[OrderOut] + dump_json
+  - orjson:           ORJSONResponse (lo que devuelven ahora los listados)
+y el tamaño/tiempo de la compresión gzip que aplica GZipMiddleware.
+    python benchmarks/bench_serialization.py
+"""
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from common import medir, usar_mongomock
+
+usar_mongomock()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import main as app_main  # noqa: E402
+from controllers import order_controller  # noqa: E402
+from responses import ORJSONResponse  # noqa: E402
+from schemas import OrderOut  # noqa: E402
+
+TAMANOS = [1_000, 10_000]
+USUARIOS = 200
+
+_orders_adapter = TypeAdapter(List[OrderOut])
+
+
+def pedidos_formateados(n):
+    users = {1000 + i: {"id": 1000 + i, "nombre": f"Cliente {i}", "email": f"c{i}@mail.com"} for i in range(USUARIOS)}
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    orders = [
+        {"id": i, "user_id": 1000 + (i % USUARIOS), "total": 25970, "estado": "pendiente",
+         "created_at": base + timedelta(seconds=i), "delivery_address": "Av. Siempre Viva 742",
+         "payment_method": "Tarjeta",
+         "items": [{"productId": 1 + (i + k) % 7, "productName": "Lomo Saltado", "quantity": 1,
+                    "priceAtPurchase": 12990} for k in range(2)]}
+        for i in range(n)
+    ]
+    async def formatear():
+        return [await order_controller.format_order_response(o, users) for o in orders]
+    return asyncio.run(formatear())
+
+
+def main():
+    print(f"{'pedidos':>8} | {'modo':<16} | {'ms':>8} | {'KB':>8}")
+    for n in TAMANOS:
+        pedidos = pedidos_formateados(n)
+        modos = [
+            ("jsonable_encoder", lambda: json.dumps(jsonable_encoder(pedidos), ensure_ascii=False).encode("utf-8")),
+            ("response_model", lambda: _orders_adapter.dump_json(_orders_adapter.validate_python(pedidos))),
+            ("orjson", lambda: ORJSONResponse(pedidos).body),
+        ]
+        for nombre, fn in modos:
+            async def ejecutar():
+                return fn()
+            ms = medir(ejecutar)
+            print(f"{n:>8} | {nombre:<16} | {ms:>8.1f} | {len(fn()) / 1024:>8.0f}")
+
+        body = ORJSONResponse(pedidos).body
+        async def comprimir():
+            return gzip.compress(body, compresslevel=app_main.GZIP_LEVEL)
+        ms = medir(comprimir)
+        print(f"{n:>8} | {'+ gzip nivel ' + str(app_main.GZIP_LEVEL):<16} | {ms:>8.1f} | "
+              f"{len(gzip.compress(body, compresslevel=app_main.GZIP_LEVEL)) / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
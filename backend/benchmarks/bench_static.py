@@ -0,0 +1,92 @@
+"""
+Benchmark del frontend servido por la API (/frontend).
+
+Simula a un cliente que abre varias veces la portada y el catálogo (HTML +
+fotos de los platos) y compara:
+  - sin_cache:  StaticFiles sin política de caché ni compresión (como antes:
+                cada visita vuelve a descargar el HTML y todas las fotos)
+  - frontend:   FrontendFiles (HTML gzip/br precomprimido que se revalida con
+                ETag -> 304, fotos cacheadas por Cache-Control)
+Reporta bytes transferidos, peticiones enviadas y visitas/peticiones por segundo.
+No necesita Mongo:
+    python benchmarks/bench_static.py
+"""
+import asyncio
+import os
+import re
+import time
+
+import common  # noqa: F401  (agrega backend/ al sys.path)
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.routing import Mount  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+
+from static_files import FRONTEND_DIR, FrontendFiles  # noqa: E402
+
+PAGINAS = ["index.html", "catalogo.html"]
+VISITAS = 200
+
+
+def fotos():
+    carpeta = os.path.join(FRONTEND_DIR, "imagenes")
+    return sorted(f"imagenes/{n}" for n in os.listdir(carpeta) if not n.startswith("."))
+
+
+class NavegadorSimulado:
+    """Cliente con caché HTTP mínima: respeta max-age y revalida con If-None-Match."""
+
+    def __init__(self, client, cachear: bool):
+        self.client = client
+        self.cachear = cachear
+        self.cache = {}  # url -> (etag, expira)
+        self.bytes = 0
+        self.peticiones = 0
+
+    async def get(self, url):
+        headers = {"Accept-Encoding": "br, gzip"}
+        guardado = self.cache.get(url)
+        if guardado:
+            etag, expira = guardado
+            if expira > time.monotonic():
+                return  # fresco en caché: ni siquiera se pide
+            if etag:
+                headers["If-None-Match"] = etag
+        response = await self.client.get(url, headers=headers)
+        self.peticiones += 1
+        self.bytes += response.num_bytes_downloaded + sum(len(k) + len(v) for k, v in response.headers.raw)
+        if self.cachear and response.status_code == 200:
+            max_age = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+            expira = time.monotonic() + int(max_age.group(1)) if max_age else 0
+            self.cache[url] = (response.headers.get("etag"), expira)
+
+
+async def correr(nombre, static_app, cachear):
+    app = Starlette(routes=[Mount("/frontend", static_app)])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        navegador = NavegadorSimulado(client, cachear)
+        recursos = PAGINAS + fotos()
+        start = time.perf_counter()
+        for _ in range(VISITAS):
+            for recurso in recursos:
+                await navegador.get(f"/frontend/{recurso}")
+        segundos = time.perf_counter() - start
+    print(f"{nombre:<10} | {navegador.peticiones:>11} | {navegador.bytes / 1024 / 1024:>9.2f} | "
+          f"{VISITAS / segundos:>10.0f} | {navegador.peticiones / segundos:>9.0f}")
+
+
+def main():
+    frontend = FrontendFiles()
+    sizes = frontend.precompress()
+    print(f"HTML precomprimido: {sizes['files']} archivos, {sizes['bytes'] // 1024} KB -> "
+          f"gzip {sizes['gzip'] // 1024} KB" + (f", br {sizes['br'] // 1024} KB" if sizes["br"] else ""))
+    print(f"{VISITAS} visitas a {', '.join(PAGINAS)} + {len(fotos())} fotos\n")
+    print(f"{'modo':<10} | {'peticiones':>11} | {'MB':>9} | {'visitas/s':>10} | {'req/s':>9}")
+    asyncio.run(correr("sin_cache", StaticFiles(directory=FRONTEND_DIR, html=True), cachear=False))
+    asyncio.run(correr("frontend", frontend, cachear=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Utilidades compartidas por los benchmarks del backend.
+
+Requieren mongomock y mongomock-motor (pip install mongomock mongomock-motor). Se ejecutan desde la carpeta backend:
+    python benchmarks/bench_order_listing.py
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Métodos de colección que cuentan como un viaje a Mongo
+OPERACIONES = [
+    "find", "find_one", "find_one_and_update", "insert_one", "insert_many",
+    "update_one", "update_many", "delete_one", "aggregate", "count_documents", "bulk_write",
+]
+
+
+def usar_mongomock():
+    """Reemplaza AsyncMongoClient por mongomock-motor ANTES de importar 'database'."""
+    import mongomock
+    import mongomock.collection
+    import mongomock_motor
+    import pymongo
+    pymongo.AsyncMongoClient = mongomock_motor.AsyncMongoMockClient
+    # La base en memoria parte vacía: sembrar admin y menú al arrancar la app
+    os.environ.setdefault("SEED_ON_STARTUP", "1")
+
+    # En la API async de pymongo aggregate() y close() son corrutinas (en motor no)
+    aggregate = mongomock_motor.AsyncMongoMockCollection.aggregate
+    async def aggregate_async(self, *args, **kwargs):
+        return aggregate(self, *args, **kwargs)
+    mongomock_motor.AsyncMongoMockCollection.aggregate = aggregate_async
+    async def close_async(self):
+        pass
+    mongomock_motor.AsyncMongoMockClient.close = close_async
+
+    # pymongo >= 4.9 pasa 'sort' a UpdateOne y mongomock aún no lo acepta
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+    def add_update_compat(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+    mongomock.collection.BulkOperationBuilder.add_update = add_update_compat
+
+
+class QueryCounter:
+    """Cuenta las operaciones de colección (solo con mongomock)."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._originales = {}
+        self._profundidad = 0
+
+    def __enter__(self):
+        import mongomock
+        for nombre in OPERACIONES:
+            original = getattr(mongomock.collection.Collection, nombre)
+            self._originales[nombre] = original
+            setattr(mongomock.collection.Collection, nombre, self._envolver(nombre, original))
+        return self
+
+    def __exit__(self, *exc):
+        import mongomock
+        for nombre, original in self._originales.items():
+            setattr(mongomock.collection.Collection, nombre, original)
+
+    def _envolver(self, nombre, original):
+        def wrapper(coleccion, *args, **kwargs):
+            # mongomock implementa find_one sobre find: solo contamos la llamada externa
+            if self._profundidad == 0:
+                self.counts[nombre] += 1
+            self._profundidad += 1
+            try:
+                return original(coleccion, *args, **kwargs)
+            finally:
+                self._profundidad -= 1
+        return wrapper
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def medir(fn, repeticiones=3):
+    """Devuelve la mejor latencia (en ms) de 'repeticiones' ejecuciones de la corrutina fn()."""
+    async def correr():
+        mejor = float("inf")
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            await fn()
+            mejor = min(mejor, (time.perf_counter() - inicio) * 1000)
+        return mejor
+    return asyncio.run(correr())
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por el método del rango más cercano."""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
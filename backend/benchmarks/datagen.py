@@ -0,0 +1,155 @@
+"""
+Generador de datos para los benchmarks: clientes, platos, pedidos, pagos y
+boletas a la escala pedida (de 10k a 1M pedidos), reproducible con --seed.
+
+Por defecto escribe en el Mongo de MONGO_URI / MONGO_DB (¡usar una base
+de pruebas!, --reset borra las colecciones). Con --mongomock genera en
+memoria (solo sirve para probar el generador):
+    MONGO_DB=sabor_bench python benchmarks/datagen.py --orders 100000 --reset
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import common
+
+CATEGORIAS = ["entradas", "fondo", "postres", "bebidas"]
+METODOS_PAGO = ["Efectivo", "Tarjeta", "Transferencia"]
+REPARTIDORES = ["Juan Pérez", "María González", "Carlos Rodríguez"]
+PASSWORD = "bench1234"
+LOTE = 5_000
+
+
+def _pedido(rng, order_id, user_id, platos, ahora, edad):
+    created_at = ahora - edad
+    items = []
+    for plato in rng.sample(platos, k=rng.choice([1, 1, 2, 2, 3, 4])):
+        items.append({"productId": plato["id"], "productName": plato["nombre"],
+                      "quantity": rng.choice([1, 1, 1, 2, 3]), "priceAtPurchase": plato["precio"]})
+    total = sum(i["priceAtPurchase"] * i["quantity"] for i in items)
+    pedido = {
+        "id": order_id, "user_id": user_id, "items": items, "total": total, "original_total": total,
+        "discount": 0, "promo_name": "", "payment_method": rng.choice(METODOS_PAGO),
+        "delivery_address": f"Calle {rng.randint(1, 999)} #{rng.randint(1, 9999)}", "created_at": created_at,
+    }
+    # Los pedidos de la última hora siguen en curso; el resto ya terminó
+    if edad < timedelta(hours=1):
+        pedido["estado"] = rng.choice(["pendiente", "pendiente", "preparando", "completado", "en_ruta"])
+    else:
+        pedido["estado"] = "anulado" if rng.random() < 0.05 else "entregado"
+    if pedido["estado"] in ("preparando", "completado", "en_ruta", "entregado"):
+        pedido["preparing_at"] = created_at + timedelta(minutes=2)
+    if pedido["estado"] in ("completado", "en_ruta", "entregado"):
+        pedido["completed_at"] = created_at + timedelta(minutes=20)
+    if pedido["estado"] in ("en_ruta", "entregado"):
+        pedido["repartidorNombre"] = rng.choice(REPARTIDORES)
+        pedido["dispatched_at"] = created_at + timedelta(minutes=21)
+    if pedido["estado"] == "entregado":
+        pedido["delivered_at"] = created_at + timedelta(minutes=45)
+    if pedido["estado"] == "anulado":
+        pedido["cancelled_at"] = created_at + timedelta(minutes=5)
+    return pedido
+
+
+async def generar(pedidos: int = 10_000, clientes: int = None, platos: int = 40,
+                  dias: int = 90, seed: int = 42, reset: bool = False) -> dict:
+    """Llena la base y devuelve {clientes, platos, pedidos, pagos, boletas, segundos}."""
+    import database
+
+    inicio = time.perf_counter()
+    rng = random.Random(seed)
+    clientes = clientes or max(100, pedidos // 20)
+    colecciones = [database.users_collection, database.dishes_collection, database.orders_collection,
+                   database.payments_collection, database.receipts_collection, database.sessions_collection,
+                   database.counters_collection, database.dish_stats_collection, database.sales_rollups_collection]
+    if reset:
+        for coleccion in colecciones:
+            await coleccion.delete_many({})
+        database.invalidate_menu_cache()
+    elif await database.orders_collection.count_documents({}, limit=1):
+        raise SystemExit("La base ya tiene pedidos: usar --reset para regenerarla")
+
+    # Admin y menú base. Los índices se crean al final: construirlos una vez
+    # sobre los datos es más rápido que mantenerlos en cada insert_many
+    await database.seed_data()
+
+    # Platos extra hasta llegar a 'platos'
+    existentes = await database.dishes_collection.count_documents({})
+    for i in range(existentes, platos):
+        await database.create_dish(f"Plato {i + 1}", rng.randrange(2990, 19990, 1000), rng.choice(CATEGORIAS),
+                                   f"Plato de prueba {i + 1}", "Ingrediente A|Ingrediente B")
+    menu = await database.get_all_dishes()
+
+    # Clientes (ids a continuación del admin), todos con el mismo hash
+    import passwords
+    password_hash = await passwords.hash_password(PASSWORD)
+    primer_cliente = await database.get_next_sequence("userid")
+    usuarios = [{"id": primer_cliente + i, "nombre": f"Cliente {i}", "email": f"cliente{i}@bench.local",
+                 "password": password_hash, "role": "cliente", "categoria": rng.choice(["nuevo", "nuevo", "frecuente", "vip"])}
+                for i in range(clientes)]
+    for i in range(0, len(usuarios), LOTE):
+        await database.users_collection.insert_many(usuarios[i:i + LOTE], ordered=False)
+    await database.counters_collection.update_one(
+        {"_id": "userid"}, {"$set": {"sequence_value": primer_cliente + clientes - 1}}, upsert=True)
+
+    # Pedidos con su pago y boleta (los anulados no se pagaron)
+    ahora = datetime.now()
+    # Distribución de fechas: más pedidos en los días recientes. Ordenadas
+    # para que, como en producción, un id mayor sea un pedido más nuevo
+    edades = sorted((int(rng.triangular(0, dias * 86400, 0)) for _ in range(pedidos)), reverse=True)
+    pagos = boletas = 0
+    for desde in range(1, pedidos + 1, LOTE):
+        lote_pedidos, lote_pagos, lote_boletas = [], [], []
+        for order_id in range(desde, min(desde + LOTE, pedidos + 1)):
+            usuario = usuarios[rng.randrange(clientes)]
+            pedido = _pedido(rng, order_id, usuario["id"], menu, ahora, timedelta(seconds=edades[order_id - 1]))
+            lote_pedidos.append(pedido)
+            if pedido["estado"] == "anulado":
+                continue
+            lote_pagos.append({"order_id": order_id, "metodo": pedido["payment_method"],
+                               "monto": pedido["total"], "confirmado": True,
+                               "created_at": pedido["created_at"]})
+            lote_boletas.append({
+                "id": order_id, "order_id": order_id, "rut_emisor": "76.123.456-7", "date": pedido["created_at"],
+                "clientName": usuario["nombre"], "clientEmail": usuario["email"],
+                "clientAddress": pedido["delivery_address"], "products": pedido["items"],
+                "total": pedido["total"], "paymentMethod": pedido["payment_method"],
+            })
+        await database.orders_collection.insert_many(lote_pedidos, ordered=False)
+        if lote_pagos:
+            await database.payments_collection.insert_many(lote_pagos, ordered=False)
+            await database.receipts_collection.insert_many(lote_boletas, ordered=False)
+        pagos += len(lote_pagos)
+        boletas += len(lote_boletas)
+    for secuencia in ("orderid", "receiptid"):
+        await database.counters_collection.update_one(
+            {"_id": secuencia}, {"$set": {"sequence_value": pedidos}}, upsert=True)
+
+    # Contadores derivados (ranking de platos y resúmenes de ventas) e índices
+    await database.rebuild_dish_stats()
+    await database.rebuild_sales_rollups()
+    await database.init_db()
+    return {"clientes": clientes, "platos": len(menu), "pedidos": pedidos, "pagos": pagos,
+            "boletas": boletas, "segundos": round(time.perf_counter() - inicio, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10_000, help="pedidos a generar (10k a 1M)")
+    parser.add_argument("--clients", type=int, help="clientes (por defecto pedidos/20)")
+    parser.add_argument("--dishes", type=int, default=40, help="platos del menú")
+    parser.add_argument("--days", type=int, default=90, help="antigüedad máxima de los pedidos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="borra las colecciones antes de generar")
+    parser.add_argument("--mongomock", action="store_true", help="generar en memoria (mongomock)")
+    args = parser.parse_args()
+    if args.mongomock:
+        common.usar_mongomock()
+    resumen = asyncio.run(generar(args.orders, args.clients, args.dishes, args.days, args.seed, args.reset))
+    print(", ".join(f"{k}: {v}" for k, v in resumen.items()))
+
+
+if __name__ == "__main__":
+    main()
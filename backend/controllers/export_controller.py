@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+import csv
+import io
+from dependencies import require_admin
+from responses import dumps
+import database
+
+router = APIRouter(prefix="/api/admin/export", tags=["Admin"])
+
+# Columnas del CSV por colección (en NDJSON va el documento completo)
+CSV_COLUMNS = {
+    "orders": ["id", "created_at", "user_id", "estado", "total", "original_total", "discount", "promo_name",
+               "payment_method", "delivery_address", "repartidorNombre", "items"],
+    "payments": ["order_id", "created_at", "metodo", "monto", "confirmado"],
+    "receipts": ["id", "order_id", "date", "rut_emisor", "clientName", "clientEmail", "clientAddress",
+                 "total", "paymentMethod", "products"],
+}
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0).isoformat()
+    if isinstance(value, (list, dict)):
+        return dumps(value).decode()  # items/products como JSON en una celda
+    return "" if value is None else value
+
+
+async def _ndjson_rows(batches):
+    # Un trozo por lote: menos escrituras al socket que una por fila
+    async for batch in batches:
+        yield b"".join(dumps(doc) + b"\n" for doc in batch)
+
+
+async def _csv_rows(batches, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for doc in batch:
+            writer.writerow([_csv_value(doc.get(c)) for c in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Encabezado solo si el rango no tenía documentos
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+@router.get("/{collection}")
+async def export_collection(collection: str, desde: datetime, hasta: datetime, format: str = "ndjson",
+                            admin: dict = Depends(require_admin)):
+    """
+    Descarga pedidos, pagos o boletas con fecha en [desde, hasta) para
+    contabilidad, ej: /api/admin/export/orders?desde=2025-01-01&hasta=2025-02-01&format=csv
+    Se envía a medida que se lee el cursor: no se arma el archivo en memoria.
+    """
+    if collection not in database.EXPORT_DATE_FIELDS:
+        raise HTTPException(status_code=404, detail="Exportación no disponible")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail="Formato inválido (ndjson o csv)")
+    desde, hasta = database.local_naive(desde), database.local_naive(hasta)
+    if desde >= hasta:
+        raise HTTPException(status_code=400, detail="Rango de fechas inválido")
+
+    batches = database.iter_export_batches(collection, desde, hasta)
+    if format == "csv":
+        body = _csv_rows(batches, CSV_COLUMNS[collection])
+    else:
+        body = _ndjson_rows(batches)
+    filename = f"{collection}-{desde:%Y%m%d}-{hasta:%Y%m%d}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    return StreamingResponse(body, media_type=FORMATS[format], headers=headers)
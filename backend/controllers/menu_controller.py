@@ -1,86 +1,111 @@
-from fastapi import APIRouter, Header, HTTPException, UploadFile, File, Form
-from typing import Optional
-from collections import Counter
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from typing import List, Optional
+from dependencies import require_admin
+from responses import ORJSONResponse, dumps
+from schemas import DishOut, MenuSearchOut
 import database 
-import shutil
-import os
+import images
 
 router = APIRouter(prefix="/api", tags=["Menú"])
 
-@router.get("/menu")
-def get_menu():
-    return database.get_all_dishes()
+# Los navegadores revalidan con If-None-Match y reciben 304 si no cambió
+MENU_CACHE_CONTROL = "no-cache"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+# JSON del menú serializado una vez por versión del snapshot
+_menu_body = (None, b"")
+
+def _menu_json(snapshot) -> bytes:
+    global _menu_body
+    version, body = _menu_body
+    if version != snapshot["version"]:
+        body = dumps(snapshot["dishes"])
+        _menu_body = (snapshot["version"], body)
+    return body
+
+@router.get("/menu", response_model=List[DishOut])
+async def get_menu(request: Request):
+    snapshot = await database.get_menu_snapshot()
+    headers = {"ETag": snapshot["etag"], "Cache-Control": MENU_CACHE_CONTROL}
+    if _etag_matches(request, snapshot["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(_menu_json(snapshot), media_type="application/json", headers=headers)
 
 # --- NUEVO ENDPOINT: TOP 3 PLATOS MÁS VENDIDOS ---
-@router.get("/menu/top")
-def get_top_dishes():
-    # 1. Obtener todas las órdenes y todos los platos
-    orders = database.get_all_orders()
-    all_dishes = database.get_all_dishes()
-    
-    if not orders:
-        # Si no hay ventas, devolvemos los 3 primeros del menú como sugerencia
-        return all_dishes[:3]
-
-    # 2. Contar frecuencia de productos
-    product_counts = Counter()
-    for order in orders:
-        # Solo contamos pedidos no anulados
-        if order.get("estado") != "anulado":
-            for item in order.get("items", []):
-                # A veces se guarda como 'productId', a veces como 'id' dependiendo de la versión del código
-                pid = item.get("productId") or item.get("id")
-                qty = item.get("quantity", 1)
-                if pid:
-                    product_counts[pid] += qty
-    
-    # 3. Obtener los 3 IDs más comunes
-    top_ids = [pid for pid, count in product_counts.most_common(3)]
-    
-    # 4. Buscar los detalles completos de esos platos
-    top_dishes = []
-    # Mapa rápido para buscar plato por ID
-    dish_map = {d["id"]: d for d in all_dishes}
-    
-    for pid in top_ids:
-        if pid in dish_map:
-            top_dishes.append(dish_map[pid])
-            
+@router.get("/menu/top", response_model=List[DishOut])
+async def get_top_dishes():
+    # Los contadores de ventas (dish_stats) se actualizan al crear/anular pedidos
+    top_ids = await database.get_top_dish_ids(3)
+    snapshot = await database.get_menu_snapshot()
+    dish_map = snapshot["by_id"]
+
+    top_dishes = [dish_map[pid] for pid in top_ids if pid in dish_map]
+
     # Si hay menos de 3 vendidos, rellenamos con otros del menú
     if len(top_dishes) < 3:
-        for dish in all_dishes:
+        for dish in snapshot["dishes"]:
             if dish not in top_dishes:
                 top_dishes.append(dish)
             if len(top_dishes) == 3:
                 break
-                
+
     return top_dishes
 
-@router.get("/menu/{dish_id}")
-def get_dish(dish_id: int):
-    dish = database.get_dish(dish_id)
+# --- BÚSQUEDA CON FACETAS (índice en memoria, ver menu_search.py) ---
+MAX_SEARCH_RESULTS = 200
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [v for v in value.split(",") if v.strip()] if value else None
+
+@router.get("/menu/search", response_model=MenuSearchOut)
+async def search_menu(
+    q: str = "",
+    categoria: Optional[str] = None,
+    disponible: Optional[bool] = None,
+    con: Optional[str] = None,
+    sin: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=MAX_SEARCH_RESULTS),
+    offset: int = Query(default=0, ge=0)
+):
+    """
+    Busca por nombre, descripción, categoría e ingredientes, sin tildes y por
+    prefijo (q=aji ama). Filtros: categoria=fondo,entradas · disponible=true ·
+    con=pollo · sin=nueces,mani (ingredientes, para alérgenos). 'facets'
+    cuenta los platos por categoría y disponibilidad.
+    """
+    result = await database.search_menu(q, _split(categoria), disponible, _split(con), _split(sin), limit, offset)
+    return ORJSONResponse(result)
+
+@router.get("/menu/{dish_id}", response_model=DishOut)
+async def get_dish(dish_id: int, request: Request, response: Response):
+    snapshot = await database.get_menu_snapshot()
+    dish = snapshot["by_id"].get(dish_id)
     if not dish:
         raise HTTPException(status_code=404, detail="Plato no encontrado")
+    # El ETag del plato deriva del snapshot: cambia con cualquier cambio del menú
+    etag = f'"{snapshot["version"]}-{dish_id}"'
+    headers = {"ETag": etag, "Cache-Control": MENU_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return dish
 
 @router.post("/products") 
-def add_dish(
+async def add_dish(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     price: int = Form(...),
     category: str = Form(...),
     description: str = Form(...),
     image: UploadFile = File(...)
 ):
-    upload_folder = "../frontend/imagenes"
-    os.makedirs(upload_folder, exist_ok=True)
-    file_location = f"{upload_folder}/{image.filename}"
-    
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-    
-    image_url_db = f"imagenes/{image.filename}"
-
-    dish = database.create_dish(
+    # Se guarda con el hash del contenido como nombre (ver images.py)
+    digest, path, image_url_db = await images.save_upload(image)
+
+    dish = await database.create_dish(
         nombre=name, 
         precio=price, 
         categoria=category,
@@ -88,24 +113,22 @@ def add_dish(
         ingredients="Ingredientes no especificados",
         image=image_url_db
     )
+    # Miniaturas y WebP después de responder
+    background_tasks.add_task(images.process_dish_image, dish["id"], path, digest)
     return {"message": "Plato agregado con imagen", "dish": dish}
 
 @router.patch("/products/{dish_id}/availability")
-def update_availability(dish_id: int, data: dict):
-    database.update_dish_availability(dish_id, data["available"])
+async def update_availability(dish_id: int, data: dict):
+    await database.update_dish_availability(dish_id, data["available"])
     return {"message": "Disponibilidad actualizada"}
 
-@router.get("/products/admin")
-def get_admin_products(Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-    return database.get_all_dishes()
+@router.get("/products/admin", response_model=List[DishOut])
+async def get_admin_products(admin: dict = Depends(require_admin)):
+    return await database.get_all_dishes()
 
 @router.get("/products/stats")
-def get_menu_stats(Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-         raise HTTPException(status_code=401, detail="Token inválido")
-    all_dishes = database.get_all_dishes()
+async def get_menu_stats(admin: dict = Depends(require_admin)):
+    all_dishes = await database.get_all_dishes()
     total = len(all_dishes)
     disponibles = sum(1 for d in all_dishes if d.get("disponible", True))
     return { "total": total, "disponibles": disponibles, "no_disponibles": total - disponibles }
\ No newline at end of file
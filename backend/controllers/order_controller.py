@@ -1,146 +1,191 @@
-from fastapi import APIRouter, HTTPException, Header
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from datetime import datetime
-import random
+import asyncio
+import secrets
+from dependencies import get_current_user, require_admin
+from responses import ORJSONResponse, dumps
+from schemas import OrderOut, order_out
 import database
+import order_events
 
 router = APIRouter(prefix="/api/orders", tags=["orders"])
 
-REPARTIDORES_DISPONIBLES = ["Juan Pérez", "María González", "Carlos López", "Ana Martínez"]
+# Tamaño de página del listado (GET /api/orders/)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
 
-# --- LÓGICA HÍBRIDA: SIMULACIÓN SOLO PARA DELIVERY ---
-def simulate_delivery_progression(order):
-    """
-    Solo avanza el pedido si ya salió de cocina (estado 'completado' o superior).
-    """
-    estado_actual = order.get("estado")
-    
-    # Si está anulado, pendiente o preparando, NO HACEMOS NADA (Manual)
-    if estado_actual in ["anulado", "pendiente", "preparando"]:
-        return order
+# Máximo de cambios por PATCH /api/orders/status
+MAX_BULK_CHANGES = 500
 
-    # Si ya está entregado, tampoco hacemos nada
-    if estado_actual == "entregado":
-        return order
+# Cada cuánto se manda un comentario para mantener viva la conexión SSE
+STREAM_HEARTBEAT_SECONDS = 15
 
-    # --- AQUI EMPIEZA LA SIMULACIÓN DE DELIVERY ---
-    # La referencia de tiempo será la última actualización ('updated_at')
-    # Si no existe, usamos 'created_at' (aunque idealmente deberíamos guardar cuándo se completó)
-    
-    # Para simplificar la demo, usaremos el tiempo transcurrido desde que se creó,
-    # pero asumiendo que la cocina ya terminó.
-    
-    created_at = order.get("created_at")
-    if not created_at: return order
-    
-    now = datetime.now()
-    elapsed_seconds = (now - created_at).total_seconds()
-    
-    nuevo_estado = estado_actual
+# Campo de la respuesta -> campos que necesita leer de Mongo (para ?fields=)
+RESPONSE_FIELDS = {
+    "id": ["id"],
+    "createdAt": ["created_at"],
+    "totalAmount": ["total"],
+    "originalAmount": ["original_total", "total"],
+    "discount": ["discount"],
+    "promoName": ["promo_name"],
+    "status": ["estado"],
+    "clientName": ["user_id"],
+    "clientEmail": ["user_id"],
+    "deliveryAddress": ["delivery_address"],
+    "paymentMethod": ["payment_method"],
+    "items": ["items"],
+    "repartidorNombre": ["repartidorNombre"],
+}
 
-    # Lógica de tiempos para la demo:
-    # Supongamos que el cocinero se demora unos segundos/minutos en marcar "Listo".
-    # Una vez que está "completado", el sistema de delivery espera un poco y lo pasa a "en_ruta".
-    
-    # Ajustamos umbrales para que se sienta natural en la demo:
-    # Si ya es "completado", pasará a "en_ruta" si el pedido tiene más de X tiempo total
-    # Ojo: Esto depende de qué tan rápido seas en la cocina.
-    
-    # ESTRATEGIA MEJORADA: Usar probabilidad o tiempo forzado desde que está completado.
-    # Como no guardamos "completed_at", usaremos una regla simple:
-    # Si está "completado", tiene un 10% de chance de pasar a "en_ruta" cada vez que se consulta (aprox cada 3-5 seg)
-    # Esto simula que el repartidor llega a recogerlo.
-    
-    # SIN EMBARGO, para ser predecible en la demo, usaremos el tiempo total:
-    
-    if estado_actual == "completado":
-        # Si han pasado más de 60 segundos desde la creación Y está listo, sale a ruta
-        if elapsed_seconds > 60: 
-            nuevo_estado = "en_ruta"
-            
-    elif estado_actual == "en_ruta":
-        # Si lleva más de 120 segundos total (2 min), se entrega
-        if elapsed_seconds > 120:
-            nuevo_estado = "entregado"
-
-    # Actualizar si hubo cambio
-    if nuevo_estado != estado_actual:
-        # Asignar chofer si pasa a ruta
-        if nuevo_estado == "en_ruta" and not order.get("repartidorNombre"):
-            chofer = random.choice(REPARTIDORES_DISPONIBLES)
-            database.assign_order(order["id"], chofer)
-            order["repartidorNombre"] = chofer
-            print(f"--> DELIVERY: Chofer {chofer} asignado al pedido #{order['id']}")
-        
-        database.update_order_status(order["id"], nuevo_estado)
-        order["estado"] = nuevo_estado
-        print(f"--> DELIVERY: Pedido #{order['id']} avanzó a {nuevo_estado}")
-
-    return order
-
-def format_order_response(order):
-    # Aplicamos la simulación HÍBRIDA
-    order = simulate_delivery_progression(order)
-    
-    client_name = "Invitado"
-    client_email = "N/A"
+async def format_order_response(order, users: Optional[dict] = None):
+    # Solo lectura: el avance del delivery lo hace delivery_scheduler
+    user = None
     if order.get("user_id"):
-        user = database.users_collection.find_one({"id": order["user_id"]})
-        if user:
-            client_name = user.get("nombre", "Sin nombre")
-            client_email = user.get("email", "Sin email")
-
-    fecha_creacion = order.get("created_at")
-    fecha_str = str(fecha_creacion) if fecha_creacion else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    return {
-        "id": order["id"],
-        "createdAt": fecha_str,
-        "totalAmount": order.get("total", 0),
-        "originalAmount": order.get("original_total", order.get("total", 0)),
-        "discount": order.get("discount", 0),
-        "promoName": order.get("promo_name", ""),
-        "status": order.get("estado", "pendiente"),
-        "clientName": client_name,
-        "clientEmail": client_email,
-        "deliveryAddress": order.get("delivery_address", "Retiro en tienda"),
-        "paymentMethod": order.get("payment_method", "Efectivo"),
-        "items": order.get("items", []),
-        "repartidorNombre": order.get("repartidorNombre")
-    }
+        # Si viene el mapa de usuarios (listados) no consultamos la BD
+        if users is not None:
+            user = users.get(order["user_id"])
+        else:
+            user = await database.users_collection.find_one({"id": order["user_id"]})
+    return order_out(order, user)
+
+async def format_orders_response(orders):
+    """
+    Versión por lotes de format_order_response: trae todos los clientes
+    del listado en una sola consulta en vez de una por pedido.
+    """
+    users = await database.get_users_by_ids(o.get("user_id") for o in orders)
+    return [await format_order_response(o, users) for o in orders]
 
 # --- ENDPOINTS (Sin cambios mayores) ---
 
-@router.get("/")
-def listar_pedidos():
-    pedidos = database.get_all_orders()
-    # También aplicamos la simulación al listar para que el admin vea los cambios
-    return [format_order_response(p) for p in pedidos]
+@router.get("/", response_model=List[OrderOut])
+async def listar_pedidos(
+    estado: Optional[str] = None,
+    user_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None
+):
+    """
+    Listado paginado (más recientes primero). Filtros opcionales:
+    estado=pendiente,preparando · user_id · desde/hasta (created_at).
+    'cursor' es el valor de la cabecera X-Next-Cursor de la página anterior
+    y 'fields' limita los campos devueltos (ej: fields=id,status,items).
+    """
+    campos = None
+    projection = None
+    if fields:
+        campos = [f for f in fields.split(",") if f in RESPONSE_FIELDS]
+        if not campos:
+            raise HTTPException(status_code=400, detail="Campos inválidos")
+        projection = [c for f in campos for c in RESPONSE_FIELDS[f]]
+
+    before = None
+    if cursor:
+        try:
+            before = database.parse_order_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    estados = estado.split(",") if estado else None
+    pedidos = await database.get_orders_page(
+        estados=estados, user_id=user_id, desde=database.local_naive(desde), hasta=database.local_naive(hasta),
+        before=before, limit=limit, projection=projection
+    )
+    headers = {}
+    if len(pedidos) == limit and pedidos[-1].get("created_at"):
+        headers["X-Next-Cursor"] = database.order_cursor(pedidos[-1])
+
+    resultado = await format_orders_response(pedidos)
+    if campos:
+        resultado = [{k: o[k] for k in campos} for o in resultado]
+    # Respuesta ya serializada: sin validación ni jsonable_encoder por pedido
+    return ORJSONResponse(resultado, headers=headers)
+
+@router.get("/stream")
+async def stream_pedidos(request: Request, token: Optional[str] = None):
+    """
+    Server-Sent Events con los cambios de pedidos (order_created y
+    status_changed). Las pantallas cargan el listado una vez y luego solo
+    reciben los cambios, en vez de consultar cada pocos segundos.
+    EventSource no manda cabeceras: el token va en ?token=. Los admins
+    reciben todo; un cliente solo {id, status} de sus propios pedidos.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    user = await database.get_user_by_token(token)
+    if not user:
+        raise HTTPException(status_code=403, detail="Sesión inválida o expirada")
+    is_admin = user.get("role") == "admin"
+    own_ids = set()
+    if not is_admin:
+        _, activos = await database.get_active_orders()
+        own_ids = {o["id"] for o in activos if o.get("user_id") == user["id"]}
+    queue = order_events.subscribe()
+
+    async def event_generator():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if is_admin:
+                    # order_created ya viene formateado desde create_order (una vez por pedido)
+                    data = event["order"] if event["type"] == "order_created" else \
+                        {k: v for k, v in event.items() if k != "type"}
+                else:
+                    if event["type"] == "order_created" and event["user_id"] == user["id"]:
+                        own_ids.add(event["id"])
+                    if event["id"] not in own_ids:
+                        continue
+                    data = {"id": event["id"], "status": event["status"]}
+                yield f"event: {event['type']}\ndata: {dumps(data).decode()}\n\n"
+        finally:
+            order_events.unsubscribe(queue)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers=headers)
 
 @router.post("/")
-def crear_pedido(data: dict, Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Debes iniciar sesión")
-    
-    token = Authorization.split(" ")[1]
-    user = database.get_user_by_token(token)
-    if not user: raise HTTPException(status_code=403, detail="Sesión inválida")
-    
+async def crear_pedido(data: dict, user: dict = Depends(get_current_user)):
+    cart = data.get("items", [])
+    if not cart:
+        raise HTTPException(status_code=400, detail="Carrito vacío")
+    if not isinstance(cart, list) or any(not isinstance(item, dict) or not isinstance(item.get("productId"), int)
+                                         for item in cart):
+        raise HTTPException(status_code=400, detail="Producto inválido")
+    if any(not isinstance(item.get("quantity"), int) or item["quantity"] <= 0 for item in cart):
+        raise HTTPException(status_code=400, detail="Cantidad inválida")
+
+    # Todos los platos del carrito de una vez
+    dishes = await database.get_dishes_by_ids(item["productId"] for item in cart)
+    missing = [str(item["productId"]) for item in cart if item["productId"] not in dishes]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Productos no encontrados: {', '.join(missing)}")
+    unavailable = [d["nombre"] for d in dishes.values() if not d.get("disponible", True)]
+    if unavailable:
+        raise HTTPException(status_code=400, detail=f"Platos no disponibles: {', '.join(unavailable)}")
+
     processed_items = []
     subtotal = 0
-    for item in data.get("items", []):
-        dish = database.get_dish(item["productId"])
-        if dish:
-            item_total = dish["precio"] * item["quantity"]
-            subtotal += item_total
-            processed_items.append({
-                "productName": dish["nombre"],
-                "quantity": item["quantity"],
-                "priceAtPurchase": dish["precio"]
-            })
-            
-    if not processed_items:
-        raise HTTPException(status_code=400, detail="Carrito vacío")
+    for item in cart:
+        dish = dishes[item["productId"]]
+        subtotal += dish["precio"] * item["quantity"]
+        processed_items.append({
+            "productId": dish["id"],
+            "productName": dish["nombre"],
+            "quantity": item["quantity"],
+            "priceAtPurchase": dish["precio"]
+        })
 
     categoria = user.get("categoria", "nuevo")
     discount = 0
@@ -152,7 +197,7 @@ def crear_pedido(data: dict, Authorization: Optional[str] = Header(default=None)
         discount = subtotal * 0.20
         promo_name = "Descuento VIP"
     
-    pedido = database.create_order(
+    pedido = await database.create_order(
         user_id=user["id"], 
         items=processed_items, 
         total=subtotal - discount, 
@@ -160,56 +205,109 @@ def crear_pedido(data: dict, Authorization: Optional[str] = Header(default=None)
         payment_method=data.get("paymentMethod", "Efectivo"), 
         delivery_address=data.get("deliveryAddress", ""),
         discount=discount,
-        promo_name=promo_name
+        promo_name=promo_name,
+        client=user
     )
-    return {"message": "Pedido creado", "orderId": pedido["id"], "pedido": format_order_response(pedido)}
+    pedido = await format_order_response(pedido, {user["id"]: user})
+    return ORJSONResponse({"message": "Pedido creado", "orderId": pedido["id"], "pedido": pedido})
 
-@router.get("/current")
-def get_current_order(Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-    token = Authorization.split(" ")[1]
-    user = database.get_user_by_token(token)
-    if not user: raise HTTPException(status_code=403, detail="Sesión expirada")
-    
-    order = database.get_latest_order_by_user(user["id"])
+@router.patch("/status")
+async def update_status_bulk(data: dict, admin: dict = Depends(require_admin)):
+    """
+    Varios cambios de estado en una sola petición (cocina y delivery):
+    {"changes": [{"id": 12, "status": "preparando"},
+                 {"id": 9, "status": "en_ruta", "repartidorNombre": "Ana"}]}
+    Responde un resultado por cambio; los inválidos no frenan al resto.
+    """
+    changes = data.get("changes")
+    if not isinstance(changes, list) or not changes or not all(isinstance(c, dict) for c in changes):
+        raise HTTPException(status_code=400, detail="Se esperaba una lista de cambios")
+    if len(changes) > MAX_BULK_CHANGES:
+        raise HTTPException(status_code=400, detail=f"Máximo {MAX_BULK_CHANGES} cambios por solicitud")
+    results = await database.update_orders_status(changes)
+    ok = sum(r["ok"] for r in results)
+    return {"ok": ok, "failed": len(results) - ok, "results": results}
+
+# JSON de /active por (versión de la vista, estados): se formatea una vez por cambio.
+# La versión reinicia con el proceso: el ETag lleva además un id del arranque
+_active_bodies = {}
+_BOOT_ID = secrets.token_hex(4)
+
+@router.get("/active", response_model=List[OrderOut])
+async def listar_activos(request: Request, estado: Optional[str] = None, admin: dict = Depends(require_admin)):
+    """
+    Pedidos activos (pendiente, preparando, completado, en_ruta) desde la
+    vista en memoria, del más antiguo al más nuevo dentro de cada estado.
+    Solo admins (cocina, delivery, administración): incluye datos de todos los clientes.
+    Filtro opcional estado=pendiente,preparando. Responde 304 con If-None-Match
+    si nada cambió desde la consulta anterior.
+    """
+    estados = tuple(estado.split(",")) if estado else None
+    version, pedidos = await database.get_active_orders(estados)
+    etag = f'"active-{_BOOT_ID}-{version}-{estado or "all"}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    key = (version, estados)
+    body = _active_bodies.get(key)
+    if body is None:
+        body = dumps(await format_orders_response(pedidos))
+        if len(_active_bodies) > 16: _active_bodies.clear()
+        _active_bodies[key] = body
+    return Response(body, media_type="application/json", headers=headers)
+
+@router.get("/current", response_model=OrderOut)
+async def get_current_order(user: dict = Depends(get_current_user)):
+    order = await database.get_latest_order_by_user(user["id"])
     if not order: raise HTTPException(status_code=404, detail="No tienes pedidos activos")
-    return format_order_response(order)
+    return ORJSONResponse(await format_order_response(order))
 
-@router.get("/history")
-def get_order_history(Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-    token = Authorization.split(" ")[1]
-    user = database.get_user_by_token(token)
-    orders = database.get_orders_by_user(user["id"])
-    return [format_order_response(o) for o in orders]
-
-@router.get("/{order_id}")
-def obtener_pedido(order_id: int):
-    order = database.get_order_by_id(order_id)
+@router.get("/history", response_model=List[OrderOut])
+async def get_order_history(user: dict = Depends(get_current_user)):
+    orders = await database.get_orders_by_user(user["id"], archived=True)
+    return ORJSONResponse(await format_orders_response(orders))
+
+@router.get("/{order_id}", response_model=OrderOut)
+async def obtener_pedido(order_id: int):
+    order = await database.get_order_by_id(order_id, archived=True)
     if not order: raise HTTPException(status_code=404, detail="Pedido no encontrado")
-    return format_order_response(order)
+    return ORJSONResponse(await format_order_response(order))
 
 @router.post("/{order_id}/cancel")
-def cancel_order(order_id: int, Authorization: Optional[str] = Header(default=None)):
-    if not Authorization or not Authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-    order = database.get_order_by_id(order_id)
+async def cancel_order(order_id: int, user: dict = Depends(get_current_user)):
+    order = await database.get_order_by_id(order_id)
     if not order: raise HTTPException(status_code=404, detail="Pedido no encontrado")
-    
-    if order["estado"] in ["en_ruta", "entregado"]:
+    if order.get("user_id") != user["id"] and user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="No puedes anular pedidos de otro cliente")
+    if order.get("estado") == "anulado":
+        raise HTTPException(status_code=409, detail="El pedido ya está anulado")
+    # Misma validación y escritura condicionada que /status: si el scheduler lo
+    # pasó a en_ruta entre medio, la anulación no se aplica
+    [result] = await database.update_orders_status([{"id": order_id, "status": "anulado"}])
+    if not result["ok"] and result["status"] in ["en_ruta", "entregado"]:
         raise HTTPException(status_code=400, detail="No es posible anular con el pedido en ruta o entregado")
-    
-    database.update_order_status(order_id, "anulado")
+    _check_single_change(result)
     return {"message": "Pedido anulado correctamente"}
 
+def _check_single_change(result: dict):
+    # 404 si el pedido no existe; 409 si su estado actual no permite el cambio
+    if not result["ok"]:
+        code = 404 if result["status"] is None else 409
+        raise HTTPException(status_code=code, detail=result["error"])
+
 @router.patch("/{order_id}/status")
-def update_status(order_id: int, data: dict):
-    database.update_order_status(order_id, data.get("status"))
+async def update_status(order_id: int, data: dict, admin: dict = Depends(require_admin)):
+    status = data.get("status")
+    if not isinstance(status, str) or status not in database.ORDER_TRANSITIONS:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {status}")
+    [result] = await database.update_orders_status([{"id": order_id, "status": status}])
+    _check_single_change(result)
     return {"message": "Estado actualizado"}
 
 @router.patch("/{order_id}/assign")
-def assign_driver(order_id: int, data: dict):
-    database.assign_order(order_id, data.get("repartidorNombre"))
+async def assign_driver(order_id: int, data: dict, admin: dict = Depends(require_admin)):
+    [result] = await database.update_orders_status(
+        [{"id": order_id, "status": "en_ruta", "repartidorNombre": data.get("repartidorNombre")}])
+    _check_single_change(result)
     return {"message": "Repartidor asignado"}
\ No newline at end of file
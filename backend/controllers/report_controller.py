@@ -1,72 +1,73 @@
-from fastapi import APIRouter, Header, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from dependencies import require_admin
+from datetime import datetime, timedelta
 import database
 
 # Creamos un router "vacío" para poder definir rutas con prefijos distintos manualmente
 router = APIRouter()
 
-# --- Función de seguridad auxiliar ---
-def verify_admin(authorization: str):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Token inválido")
-    token = authorization.split(" ")[1]
-    user = database.get_user_by_token(token)
-    if not user or user["role"] != "admin":
-        raise HTTPException(status_code=403, detail="Acceso denegado")
-    return user
-
 # --- 1. Endpoint para el DASHBOARD (Corrige el error 404) ---
 @router.get("/api/admin/dashboard", tags=["Admin"])
-def get_admin_dashboard(Authorization: Optional[str] = Header(default=None)):
+async def get_admin_dashboard(admin: dict = Depends(require_admin)):
     """
     Este endpoint alimenta la pantalla principal de administración (administracion.html)
     """
-    verify_admin(Authorization)
     # Llama a la función get_stats que definimos en database.py
-    return database.get_stats()
+    return await database.get_stats()
 
 # --- 2. Endpoints para la página de REPORTES (reporte.html) ---
+def parse_period(period: str):
+    """
+    Convierte el periodo en un rango [desde, hasta):
+    'YYYY-MM' (mes, lo que envía reporte.html), 'YYYY-MM-DD' (día),
+    o 'today' / 'week' / 'month' (relativos a hoy).
+    """
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "today":
+        return today, today + timedelta(days=1)
+    if period == "week":
+        return today - timedelta(days=6), today + timedelta(days=1)
+    if period == "month":
+        return today - timedelta(days=29), today + timedelta(days=1)
+    try:
+        if len(period) == 7:
+            desde = datetime.strptime(period, "%Y-%m")
+            hasta = (desde + timedelta(days=32)).replace(day=1)
+            return desde, hasta
+        desde = datetime.strptime(period, "%Y-%m-%d")
+        return desde, desde + timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Periodo inválido")
+
 @router.get("/api/reports/metrics", tags=["Reports"])
-def get_metrics(period: str, Authorization: Optional[str] = Header(default=None)):
-    verify_admin(Authorization)
-    
-    stats = database.get_stats()
-    
-    avg_ticket = 0
-    if stats["dailySales"] > 0 and stats["activeOrders"] > 0:
-        # Calculo simple simulado basado en datos disponibles
-        avg_ticket = stats["dailySales"] / (stats["activeOrders"] + 1) 
+async def get_metrics(period: str, admin: dict = Depends(require_admin)):
+    summary = await database.get_sales_summary(*parse_period(period))
+    if summary["orders"] <= 0:
+        raise HTTPException(status_code=404, detail="No hay datos para este periodo")
 
     return {
-        "totalSales": stats["dailySales"],
-        "averageTicket": int(avg_ticket),
-        "totalOrders": stats["activeOrders"]
+        "totalSales": summary["sales"],
+        "averageTicket": int(summary["sales"] / summary["orders"]),
+        "totalOrders": summary["orders"]
     }
 
 @router.get("/api/reports/top-products", tags=["Reports"])
-def get_top_products(period: str, Authorization: Optional[str] = Header(default=None)):
-    verify_admin(Authorization)
-    
-    # Pipeline para obtener los productos más vendidos desde MongoDB
-    pipeline = [
-        {"$unwind": "$items"},
-        {"$group": {
-            "_id": "$items.name",
-            "totalQuantity": {"$sum": "$items.quantity"},
-            "totalSales": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}}
-        }},
-        {"$sort": {"totalQuantity": -1}},
-        {"$limit": 5}
-    ]
-    
-    results = list(database.orders_collection.aggregate(pipeline))
-    
+async def get_top_products(period: str, admin: dict = Depends(require_admin)):
+    summary = await database.get_sales_summary(*parse_period(period))
+    if summary["orders"] <= 0:
+        raise HTTPException(status_code=404, detail="No hay datos para este periodo")
+
+    dish_map = (await database.get_menu_snapshot())["by_id"]
+    ranking = sorted(summary["items"].items(), key=lambda kv: kv[1]["quantity"], reverse=True)
+
     top_products = []
-    for r in results:
+    for pid, stats in ranking[:5]:
+        if stats["quantity"] <= 0: continue
+        dish = dish_map.get(pid)
         top_products.append({
-            "name": r["_id"],
-            "totalQuantity": r["totalQuantity"],
-            "totalSales": r["totalSales"]
+            "name": dish["nombre"] if dish else f"Plato #{pid}",
+            "totalQuantity": stats["quantity"],
+            "totalSales": stats["sales"]
         })
         
-    return top_products
\ No newline at end of file
+    return top_products
@@ -1,13 +1,42 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from typing import Optional, List, Dict
 import uuid
 import os
-from datetime import datetime
+import json
+import time
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import active_orders
+import archive
+import menu_search
+import metrics
+import order_events
+import passwords
+from schemas import order_out
 
 # --- Configuración de MongoDB ---
-MONGO_URI = "mongodb://localhost:27017" 
-client = MongoClient(MONGO_URI)
-db = client["sabor_limeno_db"]
+# Todo se puede ajustar por variables de entorno (ver valores por defecto)
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB = os.getenv("MONGO_DB", "sabor_limeno_db")
+MONGO_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+    "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000")),
+}
+
+# Cliente asíncrono: los endpoints esperan a Mongo sin ocupar un hilo.
+# connect=False: no se conecta hasta la primera operación (ver init_db).
+# El listener cuenta y cronometra cada comando para /metrics (ver metrics.py)
+client = AsyncMongoClient(MONGO_URI, connect=False, event_listeners=[metrics.command_listener], **MONGO_OPTIONS)
+db = client[MONGO_DB]
 
 # Colecciones
 users_collection = db["users"]
@@ -17,65 +46,335 @@ payments_collection = db["payments"]
 receipts_collection = db["receipts"]
 sessions_collection = db["sessions"]
 counters_collection = db["counters"]
+dish_stats_collection = db["dish_stats"]
+sales_rollups_collection = db["sales_rollups"]
+
+# --- Índices ---
+# Manifiesto de índices por colección: (claves, opciones). ensure_indexes
+# los crea de forma idempotente (si ya existen Mongo no hace nada) y
+# "python manage.py check-query-plans" verifica que las consultas los usen.
+INDEXES = {
+    "orders": [
+        ([("id", ASCENDING)], {"unique": True}),
+        # Listado paginado por (created_at, id) (keyset) filtrando por estado o por cliente.
+        # El id no sigue el orden de creación entre workers (bloques de ORDER_ID_BLOCK)
+        ([("estado", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], {}),
+        ([("created_at", DESCENDING), ("id", DESCENDING)], {}),
+        # Scheduler de delivery: pedidos de un estado con transición vencida
+        ([("estado", ASCENDING), ("completed_at", ASCENDING)], {}),
+        ([("estado", ASCENDING), ("dispatched_at", ASCENDING)], {}),
+        # Archivo: pedidos terminados más antiguos que N días
+        ([("estado", ASCENDING), ("created_at", ASCENDING)], {}),
+    ],
+    "users": [
+        ([("id", ASCENDING)], {"unique": True}),
+        # Login, registro y recuperación de contraseña; un correo por cuenta
+        ([("email", ASCENDING)], {"unique": True}),
+    ],
+    # Sesiones: búsqueda por token y borrado automático al expirar (TTL)
+    "sessions": [
+        ([("token", ASCENDING)], {"unique": True}),
+        ([("user_id", ASCENDING)], {}),
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "dishes": [
+        ([("id", ASCENDING)], {"unique": True}),
+    ],
+    "payments": [
+        ([("order_id", ASCENDING)], {}),
+        # Exportación por rango de fechas
+        ([("created_at", ASCENDING)], {}),
+    ],
+    "receipts": [
+        ([("order_id", ASCENDING)], {}),
+        ([("date", ASCENDING)], {}),
+    ],
+    # Ranking de más vendidos
+    "dish_stats": [
+        ([("quantity", DESCENDING)], {}),
+    ],
+    # Resúmenes de ventas por hora/día para reportes
+    "sales_rollups": [
+        ([("granularity", ASCENDING), ("start", ASCENDING)], {}),
+    ],
+}
+
+async def ensure_indexes():
+    # Un solo create_indexes (un viaje a Mongo) por colección
+    for name, specs in INDEXES.items():
+        await db[name].create_indexes([IndexModel(keys, **options) for keys, options in specs])
+
+# --- Inicialización (la llama el lifespan de main.py o manage.py) ---
+# Crear el cliente no abre conexiones; la primera operación lo hace.
+# Así importar este módulo no toca la red ni siembra datos.
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "").lower() in ("1", "true", "yes")
+
+async def init_db(seed: bool = False) -> Dict[str, float]:
+    """Conecta, asegura los índices y opcionalmente siembra. Devuelve los tiempos en ms."""
+    timings = {}
+    start = time.perf_counter()
+    await client.admin.command("ping")
+    timings["connect_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await ensure_indexes()
+    timings["indexes_ms"] = (time.perf_counter() - start) * 1000
+
+    if seed:
+        start = time.perf_counter()
+        await seed_data()
+        timings["seed_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+async def close_db():
+    await client.close()
 
 # --- Helper para IDs ---
-def get_next_sequence(sequence_name):
-    counter = counters_collection.find_one_and_update(
+async def get_next_sequence(sequence_name, block_size: int = 1):
+    """
+    Siguiente id de la secuencia. Con block_size > 1 reserva un bloque de
+    ids en una sola escritura y los entrega desde memoria; los ids no
+    usados de un bloque se pierden al reiniciar (quedan huecos).
+    """
+    if block_size <= 1:
+        return await _reserve_ids(sequence_name, 1)
+    async with _sequence_lock:
+        block = _sequence_blocks.get(sequence_name)
+        if not block or block[0] > block[1]:
+            end = await _reserve_ids(sequence_name, block_size)
+            block = [end - block_size + 1, end]
+            _sequence_blocks[sequence_name] = block
+        next_id = block[0]
+        block[0] += 1
+        return next_id
+
+async def _reserve_ids(sequence_name, count: int) -> int:
+    counter = await counters_collection.find_one_and_update(
         {"_id": sequence_name},
-        {"$inc": {"sequence_value": 1}},
+        {"$inc": {"sequence_value": count}},
         upsert=True,
         return_document=True
     )
     return counter["sequence_value"]
 
+# Bloques de ids reservados por este proceso: {secuencia: [siguiente, último]}
+ORDER_ID_BLOCK = 20
+_sequence_blocks = {}
+_sequence_lock = asyncio.Lock()
+
 # --- Usuarios ---
-def create_user(nombre, email, password) -> Optional[dict]:
-    if users_collection.find_one({"email": email}): return None
+async def create_user(nombre, email, password) -> Optional[dict]:
+    if await users_collection.find_one({"email": email}, {"_id": 1}): return None
     role = "admin" if email.endswith("@saborlimeno.com") else "cliente"
-    new_id = get_next_sequence("userid")
-    user_doc = {"id": new_id, "nombre": nombre, "email": email, "password": password, "role": role, "categoria": "nuevo"}
-    users_collection.insert_one(user_doc)
+    password_hash = await passwords.hash_password(password)
+    new_id = await get_next_sequence("userid")
+    user_doc = {"id": new_id, "nombre": nombre, "email": email, "password": password_hash, "role": role, "categoria": "nuevo"}
+    try:
+        await users_collection.insert_one(user_doc)
+    except DuplicateKeyError:  # Registro simultáneo con el mismo correo
+        return None
+    user_doc.pop("_id")
+    user_doc.pop("password")
     return user_doc
 
-def authenticate(email, password) -> Optional[dict]:
-    user = users_collection.find_one({"email": email, "password": password})
-    if user: user.pop("_id")
+async def authenticate(email, password) -> Optional[dict]:
+    user = await users_collection.find_one({"email": email}, {"_id": 0})
+    # Sin usuario se verifica igual contra un hash falso (mismo tiempo de respuesta)
+    ok, needs_rehash = await passwords.verify_password(user.get("password") if user else None, password)
+    if not ok: return None
+    stored = user.pop("password")
+    if needs_rehash:
+        # Texto plano o costo viejo: se reemplaza solo si nadie lo cambió entretanto
+        await users_collection.update_one({"id": user["id"], "password": stored},
+                                          {"$set": {"password": await passwords.hash_password(password)}})
     return user
 
-def create_session(user_id: int) -> str:
+# --- Sesiones ---
+SESSION_TTL = timedelta(days=7)
+# Caché token -> usuario: evita ir a Mongo en cada request autenticado
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_SIZE = 10000
+_token_cache = OrderedDict()
+_token_lock = threading.Lock()
+
+async def create_session(user_id: int) -> str:
     token = str(uuid.uuid4())
-    sessions_collection.insert_one({"token": token, "user_id": user_id})
+    await sessions_collection.insert_one({
+        "token": token, "user_id": user_id,
+        "created_at": datetime.now(), "expires_at": datetime.now() + SESSION_TTL
+    })
     return token
 
-def get_user_by_token(token: str) -> Optional[dict]:
-    session = sessions_collection.find_one({"token": token})
-    if session:
-        user = users_collection.find_one({"id": session["user_id"]})
-        if user: user.pop("_id"); return user
-    return None
+def _session_expiry(session: dict) -> datetime:
+    # Sesiones anteriores al índice TTL no tienen expires_at: vencen a SESSION_TTL
+    # de su creación (o ya, si tampoco tienen created_at). Ver backfill_session_expiry
+    if session.get("expires_at"): return session["expires_at"]
+    if session.get("created_at"): return session["created_at"] + SESSION_TTL
+    return datetime.min
+
+async def backfill_session_expiry(batch_size: int = 1000) -> int:
+    """Agrega expires_at a las sesiones antiguas para que el índice TTL las borre. Devuelve cuántas."""
+    count = 0
+    while True:
+        sessions = await sessions_collection.find(
+            {"expires_at": {"$exists": False}}, {"_id": 1, "created_at": 1}).limit(batch_size).to_list(None)
+        if not sessions: return count
+        # Sin created_at vencen ahora: el monitor TTL las borra en su siguiente pasada
+        now = datetime.now()
+        await sessions_collection.bulk_write([
+            UpdateOne({"_id": s["_id"]}, {"$set": {"expires_at": s["created_at"] + SESSION_TTL if s.get("created_at") else now}})
+            for s in sessions
+        ], ordered=False)
+        count += len(sessions)
+
+def _cache_token(token: str, user: dict, expires_at: Optional[datetime]):
+    cache_until = datetime.now() + timedelta(seconds=TOKEN_CACHE_TTL)
+    if expires_at and expires_at < cache_until: cache_until = expires_at
+    with _token_lock:
+        _token_cache[token] = (user, cache_until)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def invalidate_user_sessions_cache(user_id: int):
+    with _token_lock:
+        for token in [t for t, (u, _) in _token_cache.items() if u["id"] == user_id]:
+            del _token_cache[token]
+
+async def get_users_by_ids(user_ids) -> Dict[int, dict]:
+    # Una sola consulta $in para enriquecer listados (evita N+1 en pedidos)
+    ids = list({uid for uid in user_ids if uid})
+    if not ids: return {}
+    cursor = users_collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "nombre": 1, "email": 1})
+    return {u["id"]: u async for u in cursor}
 
-def update_user_details(user_id: int, data: dict):
+async def get_user_by_token(token: str) -> Optional[dict]:
+    now = datetime.now()
+    with _token_lock:
+        cached = _token_cache.get(token)
+        if cached and cached[1] > now:
+            _token_cache.move_to_end(token)
+            return dict(cached[0])
+        _token_cache.pop(token, None)
+
+    # Sesión + usuario en una sola consulta
+    pipeline = [
+        {"$match": {"token": token}},
+        {"$limit": 1},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "id", "as": "user"}},
+        {"$unwind": "$user"},
+    ]
+    result = await (await sessions_collection.aggregate(pipeline)).to_list(None)
+    if not result: return None
+    session = result[0]
+    expires_at = _session_expiry(session)
+    # El monitor TTL de Mongo borra cada ~60 s: validamos la expiración igual
+    if expires_at <= now: return None
+
+    user = session["user"]
+    user.pop("_id", None)
+    user.pop("password", None)
+    _cache_token(token, user, expires_at)
+    return dict(user)
+
+async def update_user_details(user_id: int, data: dict):
     update_data = {}
     if "nombre" in data: update_data["nombre"] = data["nombre"]
     if "email" in data: update_data["email"] = data["email"]
     if "categoria" in data: update_data["categoria"] = data["categoria"]
-    users_collection.update_one({"id": user_id}, {"$set": update_data})
+    try:
+        await users_collection.update_one({"id": user_id}, {"$set": update_data})
+    except DuplicateKeyError:  # El correo ya es de otra cuenta
+        return False
+    invalidate_user_sessions_cache(user_id)
     return True
 
-def update_password(email: str, new_password: str):
-    result = users_collection.update_one({"email": email}, {"$set": {"password": new_password}})
-    return result.modified_count > 0
+async def delete_user(user_id: int):
+    await users_collection.delete_one({"id": user_id})
+    await sessions_collection.delete_many({"user_id": user_id})
+    invalidate_user_sessions_cache(user_id)
+
+async def update_password(email: str, new_password: str):
+    password_hash = await passwords.hash_password(new_password)
+    user = await users_collection.find_one_and_update({"email": email}, {"$set": {"password": password_hash}}, projection={"id": 1})
+    if not user: return False
+    # Cambiar la contraseña cierra las sesiones abiertas
+    await sessions_collection.delete_many({"user_id": user["id"]})
+    invalidate_user_sessions_cache(user["id"])
+    return True
 
 # --- Menú (CON IMÁGENES) ---
-def get_all_dishes():
-    return list(dishes_collection.find({}, {"_id": 0}))
+# El menú cambia muy poco: lo guardamos en memoria y lo invalidamos en cada
+# escritura. El TTL acota lo desactualizado que puede quedar otro worker.
+MENU_CACHE_TTL = 30
+_menu_lock = asyncio.Lock()
+_menu_snapshot = None
+# Sube en cada invalidación: una reconstrucción que empezó antes de una escritura se descarta
+_menu_generation = 0
+MENU_REBUILD_ATTEMPTS = 3
 
-def get_dish(dish_id: int):
-    return dishes_collection.find_one({"id": dish_id}, {"_id": 0})
+async def _build_menu_snapshot():
+    dishes = await dishes_collection.find({}, {"_id": 0}).sort("id", ASCENDING).to_list(None)
+    digest = hashlib.sha1(json.dumps(dishes, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return {
+        "dishes": dishes,
+        "by_id": {d["id"]: d for d in dishes},
+        "version": digest,
+        "etag": f'"{digest}"',
+        "loaded_at": time.monotonic(),
+    }
+
+async def get_menu_snapshot() -> dict:
+    """Snapshot compartido {dishes, by_id, version, etag}: no modificar los dicts."""
+    global _menu_snapshot
+    snapshot = _menu_snapshot
+    if snapshot is None or time.monotonic() - snapshot["loaded_at"] > MENU_CACHE_TTL:
+        async with _menu_lock:
+            if _menu_snapshot is not snapshot and _menu_snapshot is not None:
+                return _menu_snapshot
+            for _ in range(MENU_REBUILD_ATTEMPTS):
+                generation = _menu_generation
+                snapshot = await _build_menu_snapshot()
+                if generation == _menu_generation:
+                    _menu_snapshot = snapshot
+                    break
+                # Hubo una escritura mientras se leía Mongo: puede no estar incluida, se vuelve a leer
+    return snapshot
+
+def invalidate_menu_cache():
+    global _menu_snapshot, _menu_generation
+    _menu_generation += 1
+    _menu_snapshot = None
+
+async def get_all_dishes():
+    return [dict(d) for d in (await get_menu_snapshot())["dishes"]]
+
+async def get_dish(dish_id: int):
+    dish = (await get_menu_snapshot())["by_id"].get(dish_id)
+    return dict(dish) if dish else None
+
+async def load_menu_index() -> int:
+    """Construye (o pone al día) el índice de búsqueda del menú. Devuelve los platos indexados."""
+    snapshot = await get_menu_snapshot()
+    menu_search.sync(snapshot["dishes"], snapshot["version"])
+    return menu_search.size()
+
+async def search_menu(q: str = "", categorias: Optional[List[str]] = None, disponible: Optional[bool] = None,
+                      con: Optional[List[str]] = None, sin: Optional[List[str]] = None,
+                      limit: int = 50, offset: int = 0) -> dict:
+    """Búsqueda con facetas en el índice en memoria (ver menu_search.py). No modificar los dicts."""
+    await load_menu_index()
+    return menu_search.search(q, categorias, disponible, con, sin, limit, offset)
+
+async def get_dishes_by_ids(dish_ids) -> Dict[int, dict]:
+    """Platos de un carrito de una vez (desde el snapshot, sin una consulta por línea)."""
+    by_id = (await get_menu_snapshot())["by_id"]
+    return {pid: dict(by_id[pid]) for pid in set(dish_ids) if pid in by_id}
 
 # CAMBIO: Acepta 'image' y tiene un valor por defecto
-def create_dish(nombre: str, precio: float, categoria: str, description: str = "", ingredients: str = "", image: str = ""):
-    new_id = get_next_sequence("dishid")
+async def create_dish(nombre: str, precio: float, categoria: str, description: str = "", ingredients: str = "", image: str = ""):
+    new_id = await get_next_sequence("dishid")
     
     # Si no se pasa imagen, usamos un placeholder
     if not image:
@@ -87,46 +386,345 @@ def create_dish(nombre: str, precio: float, categoria: str, description: str = "
         "image": image, # Guardamos la ruta de la imagen
         "disponible": True
     }
-    dishes_collection.insert_one(dish)
+    await dishes_collection.insert_one(dish)
+    dish.pop("_id")
+    invalidate_menu_cache()
+    menu_search.add(dict(dish))
     return dish
 
-def update_dish_availability(dish_id: int, available: bool):
-    dishes_collection.update_one({"id": dish_id}, {"$set": {"disponible": available}})
+async def set_dish_image_variants(dish_id: int, variants: dict):
+    # Versiones reducidas de la foto: {ancho: {"jpg": url, "webp": url}}
+    await dishes_collection.update_one({"id": dish_id}, {"$set": {"image_variants": variants}})
+    invalidate_menu_cache()
+
+async def update_dish_availability(dish_id: int, available: bool):
+    await dishes_collection.update_one({"id": dish_id}, {"$set": {"disponible": available}})
+    invalidate_menu_cache()
+    menu_search.set_available(dish_id, available)
 
 # --- Pedidos ---
-def create_order(user_id: int, items: List[dict], total: float, estado: str, payment_method: str, delivery_address: str, discount: float = 0, promo_name: str = ""):
-    new_id = get_next_sequence("orderid")
+async def create_order(user_id: int, items: List[dict], total: float, estado: str, payment_method: str, delivery_address: str, discount: float = 0, promo_name: str = "", client: Optional[dict] = None):
+    new_id = await get_next_sequence("orderid", ORDER_ID_BLOCK)
     order = {
         "id": new_id, "user_id": user_id, "items": items, 
         "total": total, "original_total": total + discount, "discount": discount, "promo_name": promo_name,
         "estado": estado, "payment_method": payment_method, "delivery_address": delivery_address,
         "created_at": datetime.now()
     }
-    orders_collection.insert_one(order)
+    await orders_collection.insert_one(order)
     order.pop("_id")
+    await _inc_dish_stats(items, 1)
+    await _inc_sales_rollups(order, 1)
+    active_orders.add(order)
+    # El evento se formatea aquí una vez, no en cada pantalla conectada ('client' = el usuario, si ya se tiene)
+    if order_events.has_subscribers():
+        if client is None and user_id:
+            client = await users_collection.find_one({"id": user_id}, {"_id": 0, "nombre": 1, "email": 1})
+        order_events.publish({"type": "order_created", "id": new_id, "user_id": user_id, "status": estado,
+                              "order": order_out(order, client)})
+    return order
+
+async def get_all_orders():
+    return await orders_collection.find({}, {"_id": 0}).to_list(None)
+
+def local_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Las fechas se guardan como hora local sin zona (datetime.now()); un
+    "2025-01-01T00:00:00Z" recibido en un filtro se pasa a esa hora para
+    poder compararlo (pymongo convertiría el aware a UTC).
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+# Más recientes primero. Con varios workers los ids se reparten en bloques
+# (ORDER_ID_BLOCK) y no siguen el orden de creación: se ordena por created_at
+# y el id solo desempata
+RECENT_FIRST = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+def _recent_key(order: dict):
+    return (order.get("created_at") or datetime.min, order["id"])
+
+def order_cursor(order: dict) -> str:
+    """Cursor keyset de la página siguiente: '<created_at ISO>_<id>' del último pedido."""
+    return f"{order['created_at'].isoformat()}_{order['id']}"
+
+def parse_order_cursor(cursor: str) -> tuple:
+    """(created_at, id) de un cursor de order_cursor. ValueError si no es válido."""
+    created_at, _, order_id = cursor.rpartition("_")
+    return local_naive(datetime.fromisoformat(created_at)), int(order_id)
+
+async def get_orders_page(estados: Optional[List[str]] = None, user_id: Optional[int] = None,
+                    desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                    before: Optional[tuple] = None, limit: int = 100,
+                    projection: Optional[List[str]] = None):
+    """
+    Página de pedidos, más recientes primero (paginación keyset por
+    created_at e id): 'before' es el (created_at, id) del último pedido de
+    la página anterior (ver parse_order_cursor).
+    """
+    query = {}
+    if estados: query["estado"] = {"$in": estados}
+    if user_id is not None: query["user_id"] = user_id
+    if desde or hasta:
+        query["created_at"] = {}
+        if desde: query["created_at"]["$gte"] = desde
+        if hasta: query["created_at"]["$lt"] = hasta
+    if before is not None:
+        created_at, order_id = before
+        query["$or"] = [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "id": {"$lt": order_id}}]
+
+    fields = {"_id": 0}
+    if projection:
+        fields.update({f: 1 for f in set(projection) | {"id", "created_at"}})
+    return await orders_collection.find(query, fields).sort(RECENT_FIRST).limit(limit).to_list(None)
+
+async def get_order_by_id(order_id: int, archived: bool = False):
+    """Con archived=True, si no está en Mongo se busca en los segmentos archivados (solo lectura)."""
+    order = await orders_collection.find_one({"id": order_id}, {"_id": 0})
+    if order is None and archived:
+        order = await archive.find_order(order_id)
     return order
 
-def get_all_orders():
-    return list(orders_collection.find({}, {"_id": 0}))
+# Marca de tiempo que se guarda al entrar a cada estado
+STATUS_TIMESTAMPS = {
+    "preparando": "preparing_at",
+    "completado": "completed_at",
+    "en_ruta": "dispatched_at",
+    "entregado": "delivered_at",
+    "anulado": "cancelled_at",
+}
 
-def get_order_by_id(order_id: int):
-    return orders_collection.find_one({"id": order_id}, {"_id": 0})
+def _status_update(status: str, now: Optional[datetime] = None) -> dict:
+    update = {"estado": status}
+    if status in STATUS_TIMESTAMPS:
+        update[STATUS_TIMESTAMPS[status]] = now or datetime.now()
+    return update
 
-def update_order_status(order_id: int, status: str):
-    orders_collection.update_one({"id": order_id}, {"$set": {"estado": status}})
+def _publish_status(order_id: int, update: dict):
+    # Todas las escrituras de estado pasan por aquí: vista de activos y SSE
+    active_orders.apply(order_id, update)
+    order_events.publish({
+        "type": "status_changed", "id": order_id,
+        "status": update["estado"], "repartidorNombre": update.get("repartidorNombre")
+    })
 
-def assign_order(order_id: int, repartidor_nombre: str):
-    orders_collection.update_one({"id": order_id}, {"$set": {"repartidorNombre": repartidor_nombre, "estado": "en_ruta"}})
+async def get_orders_due(estado: str, cutoff: datetime, limit: int = 500):
+    """
+    Pedidos en 'estado' que entraron a ese estado antes de 'cutoff'.
+    Los pedidos antiguos sin marca de tiempo usan 'created_at'. Los que
+    llevan más tiempo esperando van primero (sin marca, los más antiguos),
+    así un lote con tope no deja atrás transiciones viejas.
+    """
+    ts_field = STATUS_TIMESTAMPS[estado]
+    query = {"estado": estado, "$or": [
+        {ts_field: {"$lte": cutoff}},
+        {ts_field: {"$exists": False}, "created_at": {"$lte": cutoff}},
+    ]}
+    return await orders_collection.find(query, {"_id": 0}).sort(ts_field, ASCENDING).limit(limit).to_list(None)
 
-def get_orders_by_user(user_id: int):
-    return list(orders_collection.find({"user_id": user_id}, {"_id": 0}).sort("id", -1))
+async def get_orders_en_ruta():
+    """Pedidos en_ruta con su repartidor y dirección (carga de cada repartidor para dispatch)."""
+    return await orders_collection.find(
+        {"estado": "en_ruta"}, {"_id": 0, "id": 1, "repartidorNombre": 1, "delivery_address": 1}).to_list(None)
 
-def get_latest_order_by_user(user_id: int):
-    return orders_collection.find_one({"user_id": user_id}, sort=[("id", -1)], projection={"_id": 0})
+async def _confirm_writes(ids: List[int], token: str, modified: int) -> tuple:
+    """
+    Ids que sí escribió este bulk_write condicionado (cada $set lleva
+    status_write=token) y el estado actual del resto. Solo relee si
+    modified_count quedó corto.
+    """
+    if modified >= len(ids):
+        return set(ids), {}
+    applied, after = set(), {}
+    async for o in orders_collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "estado": 1, "status_write": 1}):
+        if o.get("status_write") == token: applied.add(o["id"])
+        else: after[o["id"]] = o.get("estado")
+    return applied, after
+
+async def apply_order_transitions(transitions: List[dict]) -> int:
+    """
+    Aplica varias transiciones en un solo bulk_write. Cada transición es
+    {"id", "from", "to", "set"}: solo se actualiza si el pedido sigue en
+    'from', así dos procesos no avanzan el mismo pedido dos veces. Solo se
+    publican (SSE y vista de activos) las que escribió esta llamada.
+    """
+    if not transitions: return 0
+    now = datetime.now()
+    token = uuid.uuid4().hex
+    ops = []
+    updates = []
+    for t in transitions:
+        update = _status_update(t["to"], now)
+        update.update(t.get("set", {}))
+        update["status_write"] = token
+        ops.append(UpdateOne({"id": t["id"], "estado": t["from"]}, {"$set": update}))
+        updates.append((t["id"], update))
+    result = await orders_collection.bulk_write(ops, ordered=False)
+    applied, _ = await _confirm_writes([order_id for order_id, _ in updates], token, result.modified_count)
+    for order_id, update in updates:
+        if order_id in applied: _publish_status(order_id, update)
+    return len(applied)
+
+# Cambios de estado permitidos (estado actual -> estados siguientes)
+ORDER_TRANSITIONS = {
+    "pendiente": {"preparando", "anulado"},
+    "preparando": {"completado", "anulado"},
+    "completado": {"en_ruta", "anulado"},
+    "en_ruta": {"entregado"},
+    "entregado": set(),
+    "anulado": set(),
+}
+
+async def update_orders_status(changes: List[dict]) -> List[dict]:
+    """
+    Cambios de estado en lote: [{"id", "status", "repartidorNombre"?}].
+    Valida cada uno contra ORDER_TRANSITIONS con una sola lectura y aplica
+    los válidos en un solo bulk_write (condicionado al estado leído, como
+    apply_order_transitions). Devuelve un resultado por cambio, en orden:
+    {"id", "ok", "status", "error"?}; ok=False no impide aplicar el resto.
+    """
+    if not changes: return []
+    ids = [c.get("id") for c in changes if isinstance(c.get("id"), int)]
+    current = {o["id"]: o async for o in orders_collection.find(
+        {"id": {"$in": ids}}, {"_id": 0, "id": 1, "estado": 1, "items": 1, "total": 1, "created_at": 1})}
+
+    now = datetime.now()
+    token = uuid.uuid4().hex
+    results, ops, pending = [], [], []
+    seen = set()
+    for change in changes:
+        order_id, status = change.get("id"), change.get("status")
+        if not isinstance(order_id, int) or not isinstance(status, str):
+            results.append({"id": order_id, "ok": False, "status": None, "error": "Id o estado inválido"})
+            continue
+        order = current.get(order_id)
+        result = {"id": order_id, "ok": False, "status": order.get("estado", "pendiente") if order else None}
+        results.append(result)
+        if order_id in seen:
+            result["error"] = "Pedido repetido en la solicitud"
+        elif order is None:
+            result["error"] = "Pedido no encontrado"
+        elif status not in ORDER_TRANSITIONS:
+            result["error"] = f"Estado inválido: {status}"
+        elif change.get("repartidorNombre") and status != "en_ruta":
+            result["error"] = "El repartidor solo se asigna al pasar a en_ruta"
+        elif status == result["status"] and not change.get("repartidorNombre"):
+            result["ok"] = True  # ya estaba en ese estado: nada que escribir
+        elif status != result["status"] and status not in ORDER_TRANSITIONS.get(result["status"], ()):
+            result["error"] = f"No se puede pasar de {result['status']} a {status}"
+        else:
+            update = _status_update(status, now)
+            if change.get("repartidorNombre"):
+                update["repartidorNombre"] = change["repartidorNombre"]
+            update["status_write"] = token
+            ops.append(UpdateOne({"id": order_id, "estado": result["status"]}, {"$set": update}))
+            pending.append((result, order, update))
+        seen.add(order_id)
+
+    if not ops: return results
+    write = await orders_collection.bulk_write(ops, ordered=False)
+    applied, after = await _confirm_writes([r["id"] for r, _, _ in pending], token, write.modified_count)
+
+    cancelled = []
+    for result, order, update in pending:
+        if result["id"] not in applied:
+            # Cambió de estado entre la lectura y la escritura: aunque ya esté en el estado
+            # pedido lo escribió otro, y sus ventas ya las descontó quien lo anuló
+            result.update(status=after.get(result["id"]), error="El pedido cambió de estado, reintentar")
+            continue
+        result.update(ok=True, status=update["estado"])
+        if update["estado"] == "anulado": cancelled.append(order)
+        _publish_status(result["id"], update)
+
+    # Las anulaciones descuentan sus ventas, todas en una escritura por colección
+    if cancelled:
+        await _inc_dish_stats([i for o in cancelled for i in o.get("items", [])], -1)
+        rollup_ops = [op for o in cancelled for op in _rollup_ops(o, -1)]
+        if rollup_ops: await sales_rollups_collection.bulk_write(rollup_ops, ordered=False)
+    return results
+
+# --- Pedidos activos en memoria (ver active_orders.py) ---
+ACTIVE_ORDERS_TTL = int(os.getenv("ACTIVE_ORDERS_TTL", "60"))
+_active_orders_lock = asyncio.Lock()
+
+async def load_active_orders() -> int:
+    active_orders.begin_load()
+    orders = await orders_collection.find({"estado": {"$in": active_orders.ACTIVE_STATES}}, {"_id": 0}).to_list(None)
+    active_orders.replace(orders)
+    return len(orders)
+
+async def get_active_orders(estados: Optional[List[str]] = None) -> tuple:
+    """(version, pedidos) desde memoria; recarga de Mongo si pasó ACTIVE_ORDERS_TTL. No modificar los dicts."""
+    if active_orders.age() > ACTIVE_ORDERS_TTL:
+        async with _active_orders_lock:
+            if active_orders.age() > ACTIVE_ORDERS_TTL:
+                await load_active_orders()
+    return active_orders.snapshot(estados)
+
+async def get_orders_by_user(user_id: int, archived: bool = False):
+    orders = await orders_collection.find({"user_id": user_id}, {"_id": 0}).sort(RECENT_FIRST).to_list(None)
+    if archived:
+        # Si un pedido quedó en los dos lados (archivado a medias) manda Mongo
+        live = {o["id"] for o in orders}
+        orders += [o for o in await archive.find_orders_by_user(user_id) if o["id"] not in live]
+        orders.sort(key=_recent_key, reverse=True)
+    return orders
+
+async def get_latest_order_by_user(user_id: int):
+    return await orders_collection.find_one({"user_id": user_id}, sort=RECENT_FIRST, projection={"_id": 0})
+
+# --- Más vendidos (contadores incrementales) ---
+def _item_dish_id(item: dict):
+    # Pedidos antiguos guardaban 'id' en vez de 'productId'
+    return item.get("productId") or item.get("id")
+
+async def _inc_dish_stats(items: List[dict], sign: int):
+    quantities = {}
+    for item in items:
+        pid = _item_dish_id(item)
+        if pid: quantities[pid] = quantities.get(pid, 0) + item.get("quantity", 1)
+    if not quantities: return
+    ops = [UpdateOne({"_id": pid}, {"$inc": {"quantity": sign * qty}}, upsert=True)
+           for pid, qty in quantities.items()]
+    await dish_stats_collection.bulk_write(ops, ordered=False)
+
+async def _iter_sold_orders(projection: dict):
+    """Pedidos no anulados de Mongo y del archivo (para recalcular contadores)."""
+    async for order in orders_collection.find({"estado": {"$ne": "anulado"}}, projection):
+        yield order
+    async for docs in _iter_archived("orders"):
+        for order in docs:
+            if order.get("estado") != "anulado": yield order
+
+async def get_top_dish_ids(k: int = 3) -> List[int]:
+    cursor = dish_stats_collection.find({"quantity": {"$gt": 0}}).sort("quantity", DESCENDING).limit(k)
+    return [s["_id"] async for s in cursor]
+
+async def rebuild_dish_stats() -> Dict[int, dict]:
+    """
+    Recalcula los contadores desde 'orders' y los reemplaza.
+    Devuelve las diferencias {dish_id: {"before", "after"}} encontradas.
+    """
+    # Los pedidos antiguos solo guardaban el nombre del plato
+    ids_by_name = {d["nombre"]: d["id"] async for d in dishes_collection.find({}, {"_id": 0, "id": 1, "nombre": 1})}
+    totals = {}
+    async for order in _iter_sold_orders({"_id": 0, "items": 1}):
+        for item in order.get("items", []):
+            pid = _item_dish_id(item) or ids_by_name.get(item.get("productName"))
+            if pid: totals[pid] = totals.get(pid, 0) + item.get("quantity", 1)
+
+    before = {s["_id"]: s.get("quantity", 0) async for s in dish_stats_collection.find()}
+    await dish_stats_collection.delete_many({})
+    if totals:
+        await dish_stats_collection.insert_many([{"_id": pid, "quantity": qty} for pid, qty in totals.items()])
+
+    return {pid: {"before": before.get(pid, 0), "after": totals.get(pid, 0)}
+            for pid in set(before) | set(totals) if before.get(pid, 0) != totals.get(pid, 0)}
 
 # --- Boleta ---
-def create_receipt(order_id: int, client_data: dict, items: list, total: float, payment_method: str):
-    new_id = get_next_sequence("receiptid")
+async def create_receipt(order_id: int, client_data: dict, items: list, total: float, payment_method: str):
+    new_id = await get_next_sequence("receiptid")
     receipt = {
         "id": new_id, "order_id": order_id, "rut_emisor": "76.123.456-7", "date": datetime.now(),
         "clientName": client_data.get("nombre", "Invitado"),
@@ -134,39 +732,220 @@ def create_receipt(order_id: int, client_data: dict, items: list, total: float,
         "clientAddress": client_data.get("address", "Retiro en tienda"),
         "products": items, "total": total, "paymentMethod": payment_method
     }
-    receipts_collection.insert_one(receipt)
+    await receipts_collection.insert_one(receipt)
     receipt.pop("_id")
     return receipt
 
-def get_receipt_by_order_id(order_id: int):
-    return receipts_collection.find_one({"order_id": order_id}, {"_id": 0})
+async def get_receipt_by_order_id(order_id: int):
+    receipt = await receipts_collection.find_one({"order_id": order_id}, {"_id": 0})
+    return receipt if receipt is not None else await archive.find_receipt(order_id)
+
+# --- Reportes: resúmenes de ventas por hora y por día ---
+# Cada pedido suma en su bucket de hora y de día; los reportes combinan
+# unos pocos buckets en vez de recorrer toda la colección de pedidos.
+def _bucket_starts(created_at: datetime):
+    hour = created_at.replace(minute=0, second=0, microsecond=0)
+    return [("hour", hour), ("day", hour.replace(hour=0))]
+
+def _rollup_inc(order: dict, sign: int) -> dict:
+    inc = {"sales": sign * order.get("total", 0), "orders": sign}
+    for item in order.get("items", []):
+        pid = _item_dish_id(item)
+        if not pid: continue
+        qty = item.get("quantity", 1)
+        inc[f"items.{pid}.quantity"] = inc.get(f"items.{pid}.quantity", 0) + sign * qty
+        inc[f"items.{pid}.sales"] = inc.get(f"items.{pid}.sales", 0) + sign * qty * item.get("priceAtPurchase", 0)
+    return inc
+
+def _rollup_ops(order: dict, sign: int) -> list:
+    created_at = order.get("created_at")
+    if not created_at: return []
+    inc = _rollup_inc(order, sign)
+    return [
+        UpdateOne(
+            {"_id": f"{granularity}:{start.isoformat()}"},
+            {"$inc": inc, "$setOnInsert": {"granularity": granularity, "start": start}},
+            upsert=True
+        )
+        for granularity, start in _bucket_starts(created_at)
+    ]
+
+async def _inc_sales_rollups(order: dict, sign: int):
+    ops = _rollup_ops(order, sign)
+    if ops: await sales_rollups_collection.bulk_write(ops, ordered=False)
+
+async def get_sales_summary(desde: datetime, hasta: datetime) -> dict:
+    """
+    Ventas en [desde, hasta) combinando buckets: días completos con el
+    resumen diario y los extremos con el horario (resolución de 1 hora).
+    """
+    desde = desde.replace(minute=0, second=0, microsecond=0)
+    first_day = desde.replace(hour=0)
+    if first_day < desde: first_day += timedelta(days=1)
+    last_day = hasta.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if first_day < last_day:
+        query = {"$or": [
+            {"granularity": "day", "start": {"$gte": first_day, "$lt": last_day}},
+            {"granularity": "hour", "start": {"$gte": desde, "$lt": first_day}},
+            {"granularity": "hour", "start": {"$gte": last_day, "$lt": hasta}},
+        ]}
+    else:
+        query = {"granularity": "hour", "start": {"$gte": desde, "$lt": hasta}}
+
+    summary = {"sales": 0, "orders": 0, "items": {}}
+    async for bucket in sales_rollups_collection.find(query, {"_id": 0}):
+        summary["sales"] += bucket.get("sales", 0)
+        summary["orders"] += bucket.get("orders", 0)
+        for pid, stats in bucket.get("items", {}).items():
+            acc = summary["items"].setdefault(int(pid), {"quantity": 0, "sales": 0})
+            acc["quantity"] += stats.get("quantity", 0)
+            acc["sales"] += stats.get("sales", 0)
+    return summary
+
+async def rebuild_sales_rollups() -> int:
+    """Recalcula todos los buckets desde 'orders'. Devuelve cuántos pedidos procesó."""
+    # Se suman en memoria (a lo más un bucket por hora) y se escriben una vez
+    buckets = {}
+    count = 0
+    async for order in _iter_sold_orders({"_id": 0, "items": 1, "total": 1, "created_at": 1}):
+        count += 1
+        if not order.get("created_at"): continue
+        inc = _rollup_inc(order, 1)
+        for granularity, start in _bucket_starts(order["created_at"]):
+            bucket = buckets.setdefault(f"{granularity}:{start.isoformat()}", {"granularity": granularity, "start": start})
+            for path, value in inc.items():
+                *parents, leaf = path.split(".")
+                totals = bucket
+                for key in parents: totals = totals.setdefault(key, {})
+                totals[leaf] = totals.get(leaf, 0) + value
+
+    await sales_rollups_collection.delete_many({})
+    docs = [{"_id": bucket_id, **bucket} for bucket_id, bucket in buckets.items()]
+    for i in range(0, len(docs), 1000):
+        await sales_rollups_collection.insert_many(docs[i:i + 1000], ordered=False)
+    return count
+
+async def get_stats():
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_bucket = await sales_rollups_collection.find_one({"_id": f"day:{today.isoformat()}"}, {"sales": 1})
 
-# --- Reportes ---
-def get_stats():
-    pipeline_sales = [{"$group": {"_id": None, "total": {"$sum": "$total"}}}]
-    sales_result = list(orders_collection.aggregate(pipeline_sales))
-    total_sales = sales_result[0]["total"] if sales_result else 0
-    
     return {
-        "dailySales": total_sales,
-        "activeOrders": orders_collection.count_documents({"estado": {"$in": ["pendiente", "preparando", "en_ruta"]}}),
-        "newClients": users_collection.count_documents({"role": "cliente"}),
+        "dailySales": today_bucket.get("sales", 0) if today_bucket else 0,
+        "activeOrders": await orders_collection.count_documents({"estado": {"$in": ["pendiente", "preparando", "en_ruta"]}}),
+        "newClients": await users_collection.count_documents({"role": "cliente"}),
         "recentActivity": [] 
     }
 
+# --- Exportación para contabilidad ---
+# Colección -> campo de fecha por el que se filtra y ordena
+EXPORT_DATE_FIELDS = {"orders": "created_at", "payments": "created_at", "receipts": "date"}
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+async def iter_export_batches(name: str, desde: datetime, hasta: datetime, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Documentos de 'name' con fecha en [desde, hasta), en lotes de a lo más
+    batch_size. El cursor trae un lote por viaje a Mongo: la memoria no
+    depende del tamaño del rango.
+    """
+    field = EXPORT_DATE_FIELDS[name]
+    # Primero lo archivado (lo más antiguo), un segmento a la vez
+    if name in archive.KINDS:
+        async for docs in _iter_archived(name, desde, hasta):
+            for i in range(0, len(docs), batch_size):
+                yield docs[i:i + batch_size]
+    cursor = db[name].find({field: {"$gte": desde, "$lt": hasta}}, {"_id": 0}).sort(field, ASCENDING).batch_size(batch_size)
+    batch = []
+    try:
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch: yield batch
+    finally:
+        # Si el cliente corta la descarga no dejamos el cursor abierto en el servidor
+        await cursor.close()
+
+async def backfill_payment_dates(batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """Pagos antiguos sin created_at: usan la fecha de su pedido. Devuelve cuántos se completaron."""
+    count = 0
+    while True:
+        payments = await payments_collection.find({"created_at": {"$exists": False}}, {"_id": 1, "order_id": 1}).limit(batch_size).to_list(None)
+        if not payments: return count
+        dates = {o["id"]: o.get("created_at") async for o in orders_collection.find(
+            {"id": {"$in": [p.get("order_id") for p in payments]}}, {"_id": 0, "id": 1, "created_at": 1})}
+        # Sin pedido (o sin fecha) queda en None para no volver a procesarlo
+        await payments_collection.bulk_write([
+            UpdateOne({"_id": p["_id"]}, {"$set": {"created_at": dates.get(p.get("order_id"))}}) for p in payments
+        ], ordered=False)
+        count += len(payments)
+
+# --- Archivo de pedidos terminados (ver archive.py) ---
+TERMINAL_STATES = [status for status, following in ORDER_TRANSITIONS.items() if not following]
+
+async def _iter_archived(kind: str, desde: Optional[datetime] = None, hasta: Optional[datetime] = None):
+    """
+    Segmentos archivados sin los pedidos que siguen en Mongo: si el archivado
+    se cortó antes de borrarlos, están en los dos lados y manda Mongo.
+    """
+    id_field = archive.KINDS[kind][0]
+    async for docs in archive.iter_segments(kind, desde, hasta):
+        live = set(await orders_collection.distinct("id", {"id": {"$in": [d[id_field] for d in docs]}}))
+        yield [d for d in docs if d[id_field] not in live] if live else docs
+
+async def archive_orders(older_than_days: int = archive.ARCHIVE_AFTER_DAYS) -> Dict[str, int]:
+    """
+    Mueve a archive/ los pedidos terminados (entregados o anulados) creados
+    hace más de older_than_days días, con sus boletas, un segmento por día.
+    Primero se escribe el segmento y el manifiesto y después se borra de
+    Mongo. Los pagos se quedan en Mongo.
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    totals = {"orders": 0, "receipts": 0, "segments": 0}
+    cursor = orders_collection.find(
+        {"estado": {"$in": TERMINAL_STATES}, "created_at": {"$lt": cutoff}}, {"_id": 0}
+    ).sort("created_at", ASCENDING).batch_size(EXPORT_BATCH_SIZE)
+    day, pending = None, []
+    async for order in cursor:
+        order_day = order["created_at"].date()
+        if pending and (order_day != day or len(pending) >= archive.SEGMENT_MAX_DOCS):
+            await _archive_day(day, pending, totals)
+            pending = []
+        day = order_day
+        pending.append(order)
+    if pending:
+        await _archive_day(day, pending, totals)
+    return totals
+
+async def _archive_day(day, orders: List[dict], totals: Dict[str, int]):
+    ids = [o["id"] for o in orders]
+    # Los que ya se archivaron en una corrida interrumpida solo se borran
+    done = await asyncio.to_thread(archive.archived_ids, "orders", day)
+    orders = [o for o in orders if o["id"] not in done]
+    receipts = await receipts_collection.find(
+        {"order_id": {"$in": [o["id"] for o in orders]}}, {"_id": 0}).to_list(None) if orders else []
+    if orders:
+        entries = await asyncio.to_thread(archive.write_segments, day, {"orders": orders, "receipts": receipts})
+        totals["segments"] += len(entries)
+    await orders_collection.delete_many({"id": {"$in": ids}})
+    await receipts_collection.delete_many({"order_id": {"$in": ids}})
+    totals["orders"] += len(orders)
+    totals["receipts"] += len(receipts)
+
 # --- SEED DATA (CON DESCIPCIONES REALES Y FOTOS) ---
-def seed_data():
+async def seed_data():
     # 1. Crear Admin si no existe
-    if users_collection.count_documents({}) == 0:
+    if await users_collection.count_documents({}) == 0:
         print("Seeding Admin User...")
-        create_user("Admin", "admin@saborlimeno.com", "1234")
+        await create_user("Admin", "admin@saborlimeno.com", "1234")
     
     # 2. Crear Platos si no existen
-    if dishes_collection.count_documents({}) == 0:
+    if await dishes_collection.count_documents({}) == 0:
         print("Seeding Menu con Descripciones Completas...")
         
         # Lomo Saltado
-        create_dish(
+        await create_dish(
             "Lomo Saltado", 12990, "fondo", 
             "Trozos de filete de vacuno salteados al wok con cebolla morada, tomate y salsa de soja. Acompañado de crujientes papas fritas y arroz blanco.",
             "Carne|Cebolla|Tomate|Papas Fritas|Arroz", 
@@ -174,7 +953,7 @@ def seed_data():
         )
         
         # Ceviche
-        create_dish(
+        await create_dish(
             "Ceviche Clásico", 10990, "entradas", 
             "Fresco pescado del día marinado en leche de tigre, limón de pica y ají limo. Servido con camote glaseado, choclo tierno y cancha serrana.", 
             "Pescado|Limón|Cebolla|Camote|Choclo", 
@@ -182,7 +961,7 @@ def seed_data():
         )
         
         # Ají de Gallina
-        create_dish(
+        await create_dish(
             "Ají de Gallina", 11990, "fondo", 
             "Pechuga de pollo deshilachada bañada en una cremosa salsa de ají amarillo, nueces y queso parmesano. Acompañado de papas, arroz y huevo.", 
             "Pollo|Ají Amarillo|Nueces|Queso|Arroz", 
@@ -190,7 +969,7 @@ def seed_data():
         )
         
         # Causa
-        create_dish(
+        await create_dish(
             "Causa Limeña", 8990, "entradas", 
             "Suave masa de papa amarilla prensada con limón y ají, rellena de palta fresca y pollo desmenuzado con mayonesa de la casa.", 
             "Papa|Pollo|Palta|Mayonesa|Limón", 
@@ -198,7 +977,7 @@ def seed_data():
         )
         
         # Suspiro
-        create_dish(
+        await create_dish(
             "Suspiro a la Limeña", 6500, "postres", 
             "Clásico postre limeño. Manjar blanco de yemas cocinado lentamente, coronado con un merengue italiano al oporto y canela.", 
             "Leche|Yemas|Azúcar|Oporto|Canela", 
@@ -206,7 +985,7 @@ def seed_data():
         )
         
         # Inca Kola
-        create_dish(
+        await create_dish(
             "Inca Kola 500ml", 1500, "postres", 
             "La bebida del sabor nacional. Gaseosa peruana dulce y refrescante con notas de hierba luisa, ideal para acompañar nuestros platos.", 
             "Soda", 
@@ -214,11 +993,9 @@ def seed_data():
         )
         
         # Arroz con Pato
-        create_dish(
+        await create_dish(
             "Arroz con Pato", 13990, "fondo", 
             "Arroz verde cocinado con cilantro y cerveza negra, servido con una pierna de pato confitada suave y jugosa, con salsa criolla.", 
             "Pato|Arroz|Cilantro|Cerveza|Cebolla", 
             "imagenes/arroz con pato desarrollo web.jpg"
         )
-
-seed_data()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Scheduler de delivery: avanza en segundo plano los pedidos que ya salieron
+de cocina (completado -> en_ruta -> entregado).
+
+Antes esta simulación se ejecutaba dentro de cada GET de pedidos; ahora
+los endpoints solo leen y las transiciones se escriben en lote. Los pedidos
+listos se asignan a repartidores por lotes cada DISPATCH_INTERVAL según su
+carga y zona (dispatch.py); los que no caben esperan en completado.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import database
+import dispatch
+
+# Tiempos de la demo
+TICK_SECONDS = 2
+PICKUP_DELAY = timedelta(seconds=60)    # completado -> en_ruta
+DELIVERY_DELAY = timedelta(seconds=60)  # en_ruta -> entregado
+BATCH_SIZE = 500
+
+_last_dispatch = {"at": None}
+
+
+async def _dispatch_ready(now: datetime) -> list:
+    """Transiciones completado -> en_ruta del lote de pedidos listos."""
+    last = _last_dispatch["at"]
+    if last is not None and 0 <= (now - last).total_seconds() < dispatch.DISPATCH_INTERVAL:
+        return []
+    _last_dispatch["at"] = now
+    ready = await database.get_orders_due("completado", now - PICKUP_DELAY, BATCH_SIZE)
+    if not ready: return []
+
+    # Los que ya tienen repartidor (asignación manual) salen tal cual
+    transitions = [{"id": o["id"], "from": "completado", "to": "en_ruta"} for o in ready if o.get("repartidorNombre")]
+    loads, zones = dispatch.current_loads(await database.get_orders_en_ruta())
+    unassigned = [o for o in ready if not o.get("repartidorNombre")]
+    for order_id, driver in dispatch.assign(unassigned, loads, zones):
+        transitions.append({"id": order_id, "from": "completado", "to": "en_ruta",
+                            "set": {"repartidorNombre": driver}})
+    waiting = len(ready) - len(transitions)
+    if waiting:
+        print(f"--> DELIVERY: {waiting} pedido(s) esperan repartidor (todos con {dispatch.DRIVER_CAPACITY} en ruta)")
+    return transitions
+
+
+async def run_once(now=None) -> int:
+    """Calcula y aplica las transiciones vencidas. Devuelve cuántas se aplicaron."""
+    now = now or datetime.now()
+    transitions = []
+
+    # Primero las entregas: liberan cupo para el lote de este tick
+    for order in await database.get_orders_due("en_ruta", now - DELIVERY_DELAY, BATCH_SIZE):
+        transitions.append({"id": order["id"], "from": "en_ruta", "to": "entregado"})
+    applied = await database.apply_order_transitions(transitions)
+
+    applied += await database.apply_order_transitions(await _dispatch_ready(now))
+    if applied:
+        print(f"--> DELIVERY: {applied} pedido(s) avanzaron de estado")
+    return applied
+
+
+async def run_forever():
+    while True:
+        try:
+            await run_once()
+        except Exception as e:
+            print(f"--> DELIVERY: error en el scheduler: {e}")
+        await asyncio.sleep(TICK_SECONDS)
+
+
+_task = None
+
+def start():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(run_forever())
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
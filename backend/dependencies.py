@@ -0,0 +1,36 @@
+"""
+Dependencias compartidas de FastAPI.
+
+Uso en un endpoint:
+    def endpoint(user: dict = Depends(get_current_user)): ...
+    def endpoint_admin(admin: dict = Depends(require_admin)): ...
+"""
+from fastapi import Depends, Header, HTTPException, Request
+from typing import Optional
+import database
+
+
+async def get_current_user(request: Request, Authorization: Optional[str] = Header(default=None)) -> dict:
+    """
+    Resuelve el usuario del token Bearer una sola vez por request
+    (queda guardado en request.state.user).
+    """
+    if hasattr(request.state, "user"):
+        return request.state.user
+
+    if not Authorization or not Authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Token inválido")
+    token = Authorization.split(" ")[1]
+    user = await database.get_user_by_token(token)
+    if not user:
+        raise HTTPException(status_code=403, detail="Sesión inválida o expirada")
+
+    request.state.user = user
+    return user
+
+
+async def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    # Usamos .get() por si el campo 'role' no existe en usuarios antiguos
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Requiere permisos de administrador")
+    return user
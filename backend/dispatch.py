@@ -0,0 +1,79 @@
+"""
+Asignación de repartidores por lotes.
+
+Cada DISPATCH_INTERVAL segundos delivery_scheduler junta los pedidos listos
+(completado) y los reparte entre los repartidores con capacidad libre
+(carga = pedidos en_ruta que llevan). Dentro del lote, los pedidos de una
+misma zona van juntos al repartidor que ya lleva pedidos a esa zona o, si
+no hay, al de menor carga. Los que no caben esperan al siguiente lote.
+
+La zona sale de delivery_address: el distrito después de la última coma
+("Av. Arequipa 1234, Miraflores") o, sin coma, la calle sin el número.
+benchmarks/bench_dispatch.py compara esta política con la asignación al azar.
+"""
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+
+REPARTIDORES = [r.strip() for r in os.getenv(
+    "REPARTIDORES", "Juan Pérez,María González,Carlos López,Ana Martínez").split(",") if r.strip()]
+# Pedidos que un repartidor lleva a la vez
+DRIVER_CAPACITY = int(os.getenv("DRIVER_CAPACITY", "3"))
+DISPATCH_INTERVAL = float(os.getenv("DISPATCH_INTERVAL", "10"))
+
+_HOUSE_NUMBER = re.compile(r"(#\s*\S+|\b(n[°º.]?|nro\.?)\s*\d+\S*|\s\d+[a-z]?\b.*$)", re.IGNORECASE)
+
+
+def zone_of(address: Optional[str]) -> str:
+    if not address:
+        return ""
+    text = unicodedata.normalize("NFKD", address).encode("ascii", "ignore").decode().lower()
+    if "," in text:
+        return text.rsplit(",", 1)[1].strip()
+    return " ".join(_HOUSE_NUMBER.sub("", text).split())
+
+
+def assign(orders: List[dict], loads: Dict[str, int], zones: Optional[Dict[str, set]] = None,
+           capacity: int = DRIVER_CAPACITY, by_zone: bool = True) -> List[tuple]:
+    """
+    Reparte 'orders' (en orden de llegada) entre los repartidores de 'loads'
+    ({nombre: pedidos que lleva}). 'zones' son las zonas a las que ya va cada
+    uno. Devuelve [(order_id, repartidor)]; los pedidos sin cupo no aparecen.
+    Con by_zone=False cada pedido va al de menor carga.
+    """
+    loads = dict(loads)
+    zones = {d: set(z) for d, z in (zones or {}).items()}
+    groups = {}
+    for order in orders:
+        key = zone_of(order.get("delivery_address")) if by_zone else order["id"]
+        groups.setdefault(key, []).append(order)
+
+    assignments = []
+    for zone, pending in groups.items():
+        while pending:
+            free = [d for d in loads if loads[d] < capacity]
+            if not free:
+                return assignments
+            # Primero quien ya va a la zona; luego el de menor carga (el orden de la lista desempata)
+            driver = min(free, key=lambda d: (not (by_zone and zone in zones.get(d, ())), loads[d]))
+            take = pending[:capacity - loads[driver]]
+            pending = pending[len(take):]
+            for order in take:
+                assignments.append((order["id"], driver))
+            loads[driver] += len(take)
+            zones.setdefault(driver, set()).add(zone)
+    return assignments
+
+
+def current_loads(en_ruta: List[dict], drivers: List[str] = REPARTIDORES) -> tuple:
+    """(cargas, zonas) por repartidor a partir de los pedidos en_ruta."""
+    loads = Counter({d: 0 for d in drivers})
+    zones = {d: set() for d in drivers}
+    for order in en_ruta:
+        driver = order.get("repartidorNombre")
+        if driver in loads:
+            loads[driver] += 1
+            zones[driver].add(zone_of(order.get("delivery_address")))
+    return dict(loads), zones
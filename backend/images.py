@@ -0,0 +1,206 @@
+"""
+Subida de imágenes de platos.
+
+Los archivos se guardan con el nombre del hash de su contenido (subir la
+misma foto dos veces no la duplica y no hay choques de nombres) y en
+segundo plano se generan versiones reducidas en JPEG y WebP para las
+tarjetas del catálogo y de la portada.
+
+UploadLimitMiddleware corta la subida mientras llega (Content-Length o
+bytes recibidos) antes de que se parsee el formulario, y el formato se
+comprueba con el contenido, no con el content_type del cliente.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+try:
+    from PIL import Image
+except ImportError:  # Sin Pillow se guarda solo el original
+    Image = None
+
+import database
+
+IMAGES_DIR = Path(__file__).resolve().parent.parent / "frontend" / "imagenes"
+IMAGES_URL = "imagenes"
+
+MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+ALLOWED_TYPES = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+# Formato real del archivo (Pillow) -> extensión
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+# Rutas con subida de imágenes: el cuerpo completo admite la imagen más los otros campos del formulario
+UPLOAD_PATHS = {("POST", "/api/products")}
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Anchos de las variantes (px): tarjeta del catálogo/portada y modal
+VARIANT_WIDTHS = [400, 800]
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Pillow libera el GIL al redimensionar/codificar: basta un pool de hilos
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("IMAGE_WORKERS", "2")), thread_name_prefix="images")
+
+
+# --- Límite de tamaño mientras se recibe ---
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """
+    FastAPI lee todo el multipart (a un archivo temporal) antes de llamar al
+    endpoint, así que el límite de save_upload llega tarde. Aquí se rechaza
+    con 413 por Content-Length y, si no viene o miente, se corta al pasar
+    el límite mientras llegan los bytes.
+    """
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self):
+        return JSONResponse({"detail": f"La imagen supera {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"}, status_code=413)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in UPLOAD_PATHS:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and (not length.isdigit() or int(length) > self.max_bytes):
+            await self._too_large()(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def receive_limited():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        async def send_wrapper(message):
+            nonlocal started
+            # El parser del formulario convierte el error en un 400: se responde 413 en su lugar
+            if exceeded: return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, receive_limited, send_wrapper)
+        except UploadTooLarge:
+            pass
+        if exceeded and not started:
+            await self._too_large()(scope, receive, send)
+
+
+def _detect_format(path: Path):
+    """Extensión según el contenido real del archivo, o None si no es JPG/PNG/WebP."""
+    if Image is not None:
+        try:
+            with Image.open(path) as img:
+                img.verify()
+                return FORMAT_EXTENSIONS.get(img.format)
+        except Exception:
+            return None
+    # Sin Pillow: firma de los primeros bytes
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if head.startswith(b"\xff\xd8\xff"): return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"): return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return ".webp"
+    return None
+
+
+async def save_upload(upload: UploadFile) -> tuple:
+    """
+    Guarda la subida por bloques calculando su hash y cortando si supera
+    MAX_UPLOAD_BYTES. Devuelve (digest, ruta en disco, url relativa).
+    """
+    ext = ALLOWED_TYPES.get(upload.content_type)
+    if not ext:
+        raise HTTPException(status_code=415, detail="Formato de imagen no soportado (JPG, PNG o WebP)")
+
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=IMAGES_DIR, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"La imagen supera {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                sha.update(chunk)
+                await asyncio.to_thread(tmp.write, chunk)
+
+        # El content_type lo declara el cliente: la extensión sale del contenido
+        ext = await asyncio.to_thread(_detect_format, Path(tmp_path))
+        if not ext:
+            raise HTTPException(status_code=415, detail="El archivo no es una imagen JPG, PNG o WebP válida")
+        digest = sha.hexdigest()[:16]
+        path = IMAGES_DIR / f"{digest}{ext}"
+        # Si ya existe es la misma foto: no se reescribe
+        if path.exists():
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest, path, f"{IMAGES_URL}/{path.name}"
+
+
+def _build_variants(path: Path, digest: str) -> dict:
+    """Genera {ancho: {"jpg": url, "webp": url}} (corre en el pool)."""
+    variants = {}
+    with Image.open(path) as original:
+        original = original.convert("RGB")
+        for width in VARIANT_WIDTHS:
+            img = original
+            if original.width > width:
+                height = round(original.height * width / original.width)
+                img = original.resize((width, height), Image.LANCZOS)
+            urls = {}
+            for fmt, ext, options in [("JPEG", "jpg", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+                                      ("WEBP", "webp", {"quality": WEBP_QUALITY, "method": 4})]:
+                name = f"{digest}-{width}.{ext}"
+                target = IMAGES_DIR / name
+                if not target.exists():
+                    img.save(target, fmt, **options)
+                urls[ext] = f"{IMAGES_URL}/{name}"
+            variants[str(width)] = urls
+    return variants
+
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()[:16]
+
+
+async def process_dish_image(dish_id: int, path: Path, digest: str):
+    """Tarea en segundo plano: genera las variantes y las guarda en el plato."""
+    if Image is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(_pool, _build_variants, path, digest)
+    except Exception as e:
+        print(f"--> IMAGENES: no se pudieron generar variantes de {path.name}: {e}")
+        return
+    await database.set_dish_image_variants(dish_id, variants)
@@ -1,5 +1,10 @@
+from contextlib import asynccontextmanager
+import os
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.openapi.utils import get_openapi
 
 from controllers import (
@@ -8,18 +13,63 @@ from controllers import (
     order_controller,
     payment_controller,
     report_controller,
-    notification_controller
+    notification_controller,
+    export_controller
 )
+import database
+import delivery_scheduler
+import images
+import metrics
+from responses import ORJSONResponse
+from static_files import FrontendFiles
 
-app = FastAPI(title="Sabor Limeño API", version="1.0.0")
+# Respuestas más chicas que esto (bytes) no se comprimen
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Conexión e índices al arrancar; la siembra solo con SEED_ON_STARTUP=1
+    # (o con "python manage.py seed")
+    start = time.perf_counter()
+    timings = await database.init_db(seed=database.SEED_ON_STARTUP)
+    total_ms = (time.perf_counter() - start) * 1000
+    detail = ", ".join(f"{k[:-3]} {v:.0f} ms" for k, v in timings.items())
+    print(f"--> STARTUP: listo en {total_ms:.0f} ms ({detail})")
+    app.state.startup_timings = {**timings, "total_ms": total_ms}
+
+    # Pedidos activos en memoria para cocina y delivery
+    print(f"--> STARTUP: {await database.load_active_orders()} pedidos activos en memoria")
+    print(f"--> STARTUP: {await database.load_menu_index()} platos en el índice de búsqueda")
+
+    # Páginas del frontend comprimidas una sola vez (gzip/br) en memoria
+    sizes = frontend_files.precompress()
+    print(f"--> STARTUP: {sizes['files']} archivos del frontend precomprimidos "
+          f"({sizes['bytes'] // 1024} KB -> gzip {sizes['gzip'] // 1024} KB)")
+
+    # Avance automático del delivery en segundo plano
+    delivery_scheduler.start()
+    yield
+    await delivery_scheduler.stop()
+    await database.close_db()
+
+app = FastAPI(title="Sabor Limeño API", version="1.0.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
+
+# Límite de tamaño de las subidas de imágenes mientras llegan (ver images.py)
+app.add_middleware(images.UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-DB-Queries", "X-DB-Time-Ms"],
 )
+# Listados grandes comprimidos (no toca SSE, imágenes ni el HTML ya precomprimido)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+# El último agregado es el más externo: mide también CORS y gzip
+app.add_middleware(metrics.MetricsMiddleware)
 
 #--- Registrar routers ---
 app.include_router(auth_controller.router)
@@ -28,11 +78,21 @@ app.include_router(order_controller.router)
 app.include_router(payment_controller.router)
 app.include_router(report_controller.router)
 app.include_router(notification_controller.router)
+app.include_router(export_controller.router)
+
+#--- Frontend e imágenes (mismo origen que la API) ---
+frontend_files = FrontendFiles()
+app.mount("/frontend", frontend_files, name="frontend")
 
 @app.get("/")
 def root():
     return {"message": "Bienvenido a la API de Sabor Limeño"}
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    # Formato de texto de Prometheus
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 #--- Agregar esquema de seguridad para mostrar el candado en Swagger ---
 def custom_openapi():
@@ -0,0 +1,150 @@
+"""
+Comandos de mantenimiento del backend.
+
+Uso (desde la carpeta backend):
+    python manage.py init-db
+    python manage.py seed
+    python manage.py rebuild-dish-stats
+    python manage.py rebuild-sales-rollups
+    python manage.py build-image-variants
+    python manage.py check-query-plans
+    python manage.py backfill-payment-dates
+    python manage.py backfill-session-expiry
+    python manage.py archive-orders --days 90
+"""
+import argparse
+import asyncio
+import sys
+
+import archive
+import database
+import images
+import query_plans
+
+
+def _print_timings(timings):
+    print(", ".join(f"{k[:-3]}: {v:.0f} ms" for k, v in timings.items()))
+
+
+def init_db(args):
+    _print_timings(asyncio.run(database.init_db()))
+    print("Índices verificados.")
+
+
+def seed(args):
+    _print_timings(asyncio.run(database.init_db(seed=True)))
+    print("Datos iniciales listos.")
+
+
+def rebuild_dish_stats(args):
+    diffs = asyncio.run(database.rebuild_dish_stats())
+    if not diffs:
+        print("Contadores de ventas consistentes.")
+        return
+    print(f"Se corrigieron {len(diffs)} contador(es):")
+    for dish_id, diff in sorted(diffs.items()):
+        print(f"  plato #{dish_id}: {diff['before']} -> {diff['after']}")
+
+
+def rebuild_sales_rollups(args):
+    count = asyncio.run(database.rebuild_sales_rollups())
+    print(f"Resúmenes de ventas recalculados a partir de {count} pedido(s).")
+
+
+def build_image_variants(args):
+    async def run():
+        count = 0
+        for dish in await database.get_all_dishes():
+            if dish.get("image_variants") or not dish.get("image", "").startswith(images.IMAGES_URL + "/"):
+                continue
+            path = images.IMAGES_DIR / dish["image"][len(images.IMAGES_URL) + 1:]
+            if not path.exists():
+                print(f"  plato #{dish['id']}: no existe {path}")
+                continue
+            await images.process_dish_image(dish["id"], path, images.file_digest(path))
+            count += 1
+        return count
+    print(f"Variantes generadas para {asyncio.run(run())} plato(s).")
+
+
+def check_query_plans(args):
+    async def run():
+        return await query_plans.missing_indexes(), await query_plans.check_query_plans(args.max_ratio)
+    try:
+        missing, results = asyncio.run(run())
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    for collection, keys in missing:
+        print(f"FALTA ÍNDICE {collection}: {keys} (python manage.py init-db)")
+    print(f"{'accesor':<30} | {'comando':<9} | {'colección':<14} | {'plan':<34} | {'docs/dev':>8} | estado")
+    for r in results:
+        plan = " > ".join(r["stages"])[:34]
+        estado = "OK" if r["ok"] else "FALLA: " + "; ".join(r["problems"])
+        print(f"{r['accessor']:<30} | {r['command']:<9} | {r['collection']:<14} | {plan:<34} | {r['ratio']:>8.1f} | {estado}")
+
+    failed = [r for r in results if not r["ok"]]
+    if missing or failed:
+        print(f"\n{len(failed)} consulta(s) sin índice adecuado, {len(missing)} índice(s) faltante(s).")
+        sys.exit(1)
+    print(f"\n{len(results)} consultas usan índices.")
+
+
+def backfill_payment_dates(args):
+    count = asyncio.run(database.backfill_payment_dates())
+    print(f"Se completó la fecha de {count} pago(s).")
+
+
+def backfill_session_expiry(args):
+    count = asyncio.run(database.backfill_session_expiry())
+    print(f"Se agregó la expiración a {count} sesión(es).")
+
+
+def archive_orders(args):
+    totals = asyncio.run(database.archive_orders(args.days))
+    print(f"Archivados {totals['orders']} pedido(s) y {totals['receipts']} boleta(s) "
+          f"en {totals['segments']} segmento(s) de {archive.ARCHIVE_DIR}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comandos de mantenimiento de Sabor Limeño")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init-db", help="Crea los índices que falten")
+    p.set_defaults(func=init_db)
+
+    p = sub.add_parser("seed", help="Crea índices, el admin y el menú inicial si no existen")
+    p.set_defaults(func=seed)
+
+    p = sub.add_parser("rebuild-dish-stats", help="Recalcula los más vendidos desde 'orders'")
+    p.set_defaults(func=rebuild_dish_stats)
+
+    p = sub.add_parser("rebuild-sales-rollups", help="Recalcula los resúmenes de ventas por hora/día")
+    p.set_defaults(func=rebuild_sales_rollups)
+
+    p = sub.add_parser("build-image-variants", help="Genera miniaturas y WebP de los platos que no las tienen")
+    p.set_defaults(func=build_image_variants)
+
+    p = sub.add_parser("check-query-plans", help="Falla si alguna consulta hace COLLSCAN (requiere mongod)")
+    p.add_argument("--max-ratio", type=float, default=query_plans.MAX_DOCS_RATIO,
+                   help="máximo de documentos examinados por documento devuelto")
+    p.set_defaults(func=check_query_plans)
+
+    p = sub.add_parser("backfill-payment-dates", help="Agrega created_at a los pagos antiguos (para exportarlos)")
+    p.set_defaults(func=backfill_payment_dates)
+
+    p = sub.add_parser("backfill-session-expiry", help="Agrega expires_at a las sesiones antiguas (índice TTL)")
+    p.set_defaults(func=backfill_session_expiry)
+
+    p = sub.add_parser("archive-orders", help="Mueve los pedidos terminados antiguos a archivos comprimidos")
+    p.add_argument("--days", type=int, default=archive.ARCHIVE_AFTER_DAYS,
+                   help="archivar los entregados/anulados creados hace más de N días")
+    p.set_defaults(func=archive_orders)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
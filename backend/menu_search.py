@@ -0,0 +1,244 @@
+"""
+Índice invertido en memoria para /api/menu/search (un proceso).
+
+Indexa nombre, descripción, categoría e ingredientes (separados por "|")
+de cada plato. El texto se normaliza sin tildes ni mayúsculas ("Ají" ->
+"aji"), así que "aji", "AJÍ" y "ají" encuentran lo mismo. Cada palabra de
+la búsqueda se compara como prefijo ("pol ama" encuentra "Pollo ... Ají
+Amarillo") y todas tienen que aparecer. El orden es por relevancia: una
+coincidencia en el nombre pesa más que en los ingredientes o la descripción.
+
+Los filtros de ingredientes (con/sin, ej: sin=nueces,mani para alérgenos)
+miran solo el campo ingredients: cada valor se busca como frase dentro de
+un mismo ingrediente, también por prefijo ("aji amarillo" no excluye "Ají
+Limo"). Las facetas cuentan platos por categoría y disponibilidad sobre el
+resultado, sin aplicar el filtro de la propia faceta (para poder mostrar
+las otras opciones).
+
+database.py actualiza el índice plato a plato en create_dish y
+update_dish_availability, y lo sincroniza con el snapshot del menú cuando
+éste se recarga (cambios de otros workers): solo se reindexan los platos
+que cambiaron.
+"""
+import bisect
+import re
+import unicodedata
+from typing import List, Optional
+
+# Peso de una coincidencia según el campo
+FIELD_WEIGHTS = {"nombre": 8, "categoria": 4, "ingredients": 2, "description": 1}
+# Peso extra si la palabra coincide completa (no solo como prefijo)
+EXACT_BONUS = 1
+STOPWORDS = {"a", "al", "con", "de", "del", "e", "el", "en", "la", "las", "lo", "los", "o", "para",
+             "por", "sin", "su", "un", "una", "y"}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_dishes = {}          # id -> plato (dict compartido, no modificar)
+_signatures = {}      # id -> campos indexados, para saber si cambió
+_terms = {}           # palabra -> {id: peso}
+_vocabulary = []      # palabras de _terms, ordenadas (búsqueda por prefijo)
+_ingredients = {}     # palabra de ingrediente -> {ids}
+_ingredient_vocabulary = []
+_categories = {}      # categoría -> {ids}
+_available = set()
+_state = {"version": None}
+
+
+def fold(text: Optional[str]) -> str:
+    """Minúsculas y sin tildes (la ñ queda como n)."""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+
+
+def tokens(text: Optional[str]) -> List[str]:
+    return [w for w in _WORD.findall(fold(text)) if w not in STOPWORDS]
+
+
+def _signature(dish: dict) -> tuple:
+    return (dish.get("nombre"), dish.get("description"), dish.get("categoria"),
+            dish.get("ingredients"), dish.get("disponible", True))
+
+
+def _postings_add(index: dict, vocabulary: list, term: str, empty):
+    postings = index.get(term)
+    if postings is None:
+        postings = index[term] = empty()
+        bisect.insort(vocabulary, term)
+    return postings
+
+
+def _postings_remove(index: dict, vocabulary: list, term: str, dish_id: int):
+    postings = index[term]
+    if isinstance(postings, dict): postings.pop(dish_id, None)
+    else: postings.discard(dish_id)
+    if not postings:
+        del index[term]
+        del vocabulary[bisect.bisect_left(vocabulary, term)]
+
+
+def _index_terms(dish: dict) -> tuple:
+    weights = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokens(dish.get(field)):
+            weights[term] = max(weights.get(term, 0), weight)
+    return weights, set(tokens((dish.get("ingredients") or "").replace("|", " ")))
+
+
+def _remove(dish_id: int):
+    dish = _dishes.pop(dish_id, None)
+    if dish is None: return
+    del _signatures[dish_id]
+    weights, ingredients = _index_terms(dish)
+    for term in weights: _postings_remove(_terms, _vocabulary, term, dish_id)
+    for term in ingredients: _postings_remove(_ingredients, _ingredient_vocabulary, term, dish_id)
+    category = dish.get("categoria") or ""
+    _categories[category].discard(dish_id)
+    if not _categories[category]: del _categories[category]
+    _available.discard(dish_id)
+
+
+def _add(dish: dict):
+    dish_id = dish["id"]
+    _remove(dish_id)
+    _dishes[dish_id] = dish
+    _signatures[dish_id] = _signature(dish)
+    weights, ingredients = _index_terms(dish)
+    for term, weight in weights.items(): _postings_add(_terms, _vocabulary, term, dict)[dish_id] = weight
+    for term in ingredients: _postings_add(_ingredients, _ingredient_vocabulary, term, set).add(dish_id)
+    _categories.setdefault(dish.get("categoria") or "", set()).add(dish_id)
+    if dish.get("disponible", True): _available.add(dish_id)
+
+
+# --- Actualización ---
+def add(dish: dict):
+    """Plato nuevo o modificado."""
+    _add(dish)
+
+
+def set_available(dish_id: int, available: bool):
+    dish = _dishes.get(dish_id)
+    if dish is None: return
+    # Dict nuevo: el del snapshot del menú no se toca
+    _dishes[dish_id] = {**dish, "disponible": available}
+    _signatures[dish_id] = _signature(_dishes[dish_id])
+    if available: _available.add(dish_id)
+    else: _available.discard(dish_id)
+
+
+def sync(dishes: List[dict], version) -> int:
+    """Alinea el índice con el snapshot del menú. Devuelve cuántos platos se reindexaron."""
+    if _state["version"] == version:
+        return 0
+    changed = 0
+    seen = set()
+    for dish in dishes:
+        seen.add(dish["id"])
+        if _signatures.get(dish["id"]) != _signature(dish):
+            _add(dish)
+            changed += 1
+        else:
+            # Mismo contenido indexado: basta con apuntar al dict nuevo (imagen, precio)
+            _dishes[dish["id"]] = dish
+    for dish_id in [i for i in _dishes if i not in seen]:
+        _remove(dish_id)
+        changed += 1
+    _state["version"] = version
+    return changed
+
+
+# --- Búsqueda ---
+def _expand(vocabulary: list, prefix: str) -> List[str]:
+    """Palabras del vocabulario que empiezan con 'prefix'."""
+    start = bisect.bisect_left(vocabulary, prefix)
+    end = bisect.bisect_left(vocabulary, prefix + "\x7f")
+    return vocabulary[start:end]
+
+
+def _with_ingredient(prefix: str) -> set:
+    ids = set()
+    for term in _expand(_ingredient_vocabulary, prefix):
+        ids |= _ingredients[term]
+    return ids
+
+
+def _has_phrase(ingredient_words: List[str], words: List[str]) -> bool:
+    # Palabras seguidas dentro de un mismo ingrediente, cada una por prefijo
+    n = len(words)
+    return any(all(ingredient_words[i + k].startswith(w) for k, w in enumerate(words))
+               for i in range(len(ingredient_words) - n + 1))
+
+
+def _with_ingredient_phrase(words: List[str]) -> set:
+    """Platos con un ingrediente que contiene 'words' seguidas ("aji amarillo", no "aji" o "amarillo" sueltos)."""
+    ids = _with_ingredient(words[0])
+    if len(words) == 1: return ids
+    for word in words[1:]:
+        ids &= _with_ingredient(word)
+    return {i for i in ids
+            if any(_has_phrase(tokens(part), words) for part in (_dishes[i].get("ingredients") or "").split("|"))}
+
+
+def search(q: str = "", categorias: Optional[List[str]] = None, disponible: Optional[bool] = None,
+           con: Optional[List[str]] = None, sin: Optional[List[str]] = None,
+           limit: int = 50, offset: int = 0) -> dict:
+    """
+    {"total", "items", "facets"}: items son los platos de la página, por
+    relevancia (o por id si no hay texto); facets = {"categoria": {...},
+    "disponible": {"true": n, "false": n}}.
+    """
+    words = tokens(q)
+    if words:
+        scores = None
+        for word in words:
+            word_scores = {}
+            for term in _expand(_vocabulary, word):
+                bonus = EXACT_BONUS if term == word else 0
+                for dish_id, weight in _terms[term].items():
+                    if weight + bonus > word_scores.get(dish_id, 0):
+                        word_scores[dish_id] = weight + bonus
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {i: s + word_scores[i] for i, s in scores.items() if i in word_scores}
+            if not scores: break
+        matched = set(scores)
+    else:
+        scores = None
+        matched = set(_dishes)
+
+    # Cada valor de con/sin es un ingrediente completo (frase), no palabras sueltas
+    for words in filter(None, map(tokens, con or [])):
+        matched &= _with_ingredient_phrase(words)
+    for words in filter(None, map(tokens, sin or [])):
+        matched -= _with_ingredient_phrase(words)
+
+    # Categorías sin distinguir tildes ni mayúsculas
+    in_category = None
+    if categorias:
+        wanted = {fold(c).strip() for c in categorias}
+        in_category = set().union(*[ids for c, ids in _categories.items() if fold(c).strip() in wanted])
+    in_availability = None
+    if disponible is not None:
+        in_availability = _available if disponible else set(_dishes) - _available
+
+    by_category = matched if in_availability is None else matched & in_availability
+    by_availability = matched if in_category is None else matched & in_category
+    facets = {
+        "categoria": {c: n for c, ids in sorted(_categories.items()) if (n := len(ids & by_category))},
+        "disponible": {"true": len(by_availability & _available),
+                       "false": len(by_availability - _available)},
+    }
+
+    result = by_availability if in_availability is None else by_availability & in_availability
+    if scores is not None:
+        ordered = sorted(result, key=lambda i: (-scores[i], i))
+    else:
+        ordered = sorted(result)
+    return {"total": len(ordered), "items": [_dishes[i] for i in ordered[offset:offset + limit]],
+            "facets": facets}
+
+
+def size() -> int:
+    return len(_dishes)
@@ -0,0 +1,219 @@
+"""
+Métricas de la API en formato Prometheus (GET /metrics).
+
+- MetricsMiddleware (ASGI) mide cada petición por ruta (la plantilla, ej:
+  /api/orders/{order_id}, no la URL) y agrega la cabecera X-DB-Queries con
+  los comandos de Mongo que hizo esa petición.
+- command_listener (pymongo.monitoring) cuenta y cronometra cada comando,
+  lo suma a la petición en curso (contextvar) y deja en el log los que
+  superan SLOW_QUERY_MS.
+Los valores son por proceso: con varios workers cada uno expone los suyos.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Cabeceras X-DB-Queries / X-DB-Time-Ms en cada respuesta (0 para ocultarlas)
+DEBUG_HEADERS = os.getenv("METRICS_DEBUG_HEADERS", "1") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+MONGO_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets, labels):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}  # valores de labels -> [cuentas por bucket..., suma, total]
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- Registro de métricas ---
+_lock = threading.Lock()
+http_requests = Counter("http_requests_total", "Peticiones HTTP por ruta y código", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "Latencia por ruta", LATENCY_BUCKETS, ("method", "route"))
+http_db_commands = Histogram("http_request_db_commands", "Comandos Mongo por petición", QUERY_COUNT_BUCKETS, ("method", "route"))
+http_db_time = Histogram("http_request_db_seconds", "Tiempo en Mongo por petición", LATENCY_BUCKETS, ("method", "route"))
+mongo_commands = Counter("mongodb_commands_total", "Comandos Mongo por tipo y colección", ("command", "collection", "outcome"))
+mongo_duration = Histogram("mongodb_command_duration_seconds", "Duración de comandos Mongo", MONGO_BUCKETS, ("command",))
+mongo_slow = Counter("mongodb_slow_commands_total", f"Comandos Mongo de más de {SLOW_QUERY_MS:.0f} ms", ("command", "collection"))
+METRICS = [http_requests, http_latency, http_db_commands, http_db_time, mongo_commands, mongo_duration, mongo_slow]
+
+
+def render() -> str:
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+# --- Comandos de Mongo ---
+class RequestStats:
+    __slots__ = ("commands", "mongo_seconds")
+
+    def __init__(self):
+        self.commands = 0
+        self.mongo_seconds = 0.0
+
+
+# Estadísticas de la petición HTTP en curso (None fuera de una petición)
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+# Comandos que se están capturando (lista) o None: lo usa query_plans.py
+captured_commands: ContextVar = ContextVar("captured_commands", default=None)
+
+# Comandos que no son consultas de la aplicación
+_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions"}
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._pending = {}  # (conexión, request_id) -> (colección, comando)
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        self._pending[(event.connection_id, event.request_id)] = (collection, event.command)
+        captured = captured_commands.get()
+        if captured is not None:
+            captured.append((event.database_name, event.command_name, event.command))
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+    def _finish(self, event, outcome: str):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, command = pending
+        seconds = event.duration_micros / 1_000_000
+        stats = current_request.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.mongo_seconds += seconds
+        slow = seconds * 1000 >= SLOW_QUERY_MS
+        with _lock:
+            mongo_commands.inc(event.command_name, collection, outcome)
+            mongo_duration.observe(seconds, event.command_name)
+            if slow:
+                mongo_slow.inc(event.command_name, collection)
+        if slow:
+            detail = {k: (v if k in _PLAIN_FIELDS or k == event.command_name else _shape(v)) for k, v in command.items() if k not in _OMITTED_FIELDS}
+            print(f"--> SLOW QUERY: {event.command_name} {collection} {seconds * 1000:.0f} ms {str(detail)[:300]}")
+
+
+command_listener = MongoCommandListener()
+
+# En el log de consultas lentas los filtros salen sin valores (emails, contraseñas...)
+_OMITTED_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "documents", "updates", "deletes"}
+_PLAIN_FIELDS = {"sort", "projection", "limit", "skip", "batchSize", "hint"}
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shape(v) for v in value[:3]]
+    return "?"
+
+
+# --- Middleware HTTP ---
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Montajes (ej: /frontend) o rutas inexistentes (no usar la URL: cardinalidad)
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if DEBUG_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.commands)
+                    headers["X-DB-Time-Ms"] = f"{stats.mongo_seconds * 1000:.1f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            method, route = scope["method"], _route_label(scope)
+            with _lock:
+                http_requests.inc(method, route, status)
+                http_latency.observe(elapsed, method, route)
+                http_db_commands.observe(stats.commands, method, route)
+                http_db_time.observe(stats.mongo_seconds, method, route)
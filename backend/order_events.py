@@ -0,0 +1,50 @@
+"""
+Bus de eventos de pedidos en memoria (un proceso).
+
+database.py publica un evento en cada escritura de pedidos y el endpoint
+/api/orders/stream los reenvía a las pantallas conectadas (SSE).
+Con varios workers cada proceso solo ve sus propias escrituras.
+"""
+import asyncio
+import threading
+
+QUEUE_SIZE = 1000
+
+_subscribers = set()
+_lock = threading.Lock()
+
+
+def subscribe() -> asyncio.Queue:
+    """Registra una cola en el event loop actual (llamar desde código async)."""
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    with _lock:
+        _subscribers.add((asyncio.get_running_loop(), queue))
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue):
+    with _lock:
+        for sub in [s for s in _subscribers if s[1] is queue]:
+            _subscribers.discard(sub)
+
+
+def has_subscribers() -> bool:
+    return bool(_subscribers)
+
+
+def _offer(queue: asyncio.Queue, event: dict):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Cliente demasiado lento: se pierde el evento, el cliente recarga
+        pass
+
+
+def publish(event: dict):
+    """Se puede llamar desde cualquier hilo (las rutas síncronas corren en el threadpool)."""
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        if loop.is_closed():
+            continue
+        loop.call_soon_threadsafe(_offer, queue, event)
@@ -0,0 +1,122 @@
+"""
+Hash de contraseñas.
+
+Usa argon2id (argon2-cffi) si está instalado, si no bcrypt y como último
+recurso scrypt de hashlib. Calcular un hash cuesta a propósito decenas de
+ms de CPU: se hace en un pool de hilos acotado (las tres librerías liberan
+el GIL) para no frenar el event loop ni al resto de los endpoints.
+
+Las contraseñas antiguas en texto plano siguen funcionando: verify_password()
+indica que hay que rehashearlas y database.authenticate las migra en el
+primer login. Lo mismo pasa si se cambia el costo configurado.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+# Costo (subirlo hace cada login más lento y más caro de atacar)
+ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 15)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# Hilos que calculan hashes a la vez; el resto de los logins espera su turno
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("PASSWORD_WORKERS", "2")), thread_name_prefix="passwords")
+
+if argon2 is not None:
+    _argon2 = argon2.PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_KIB, parallelism=1)
+    SCHEME = "argon2"
+elif bcrypt is not None:
+    SCHEME = "bcrypt"
+else:
+    SCHEME = "scrypt"
+
+
+# --- Funciones síncronas (corren en el pool) ---
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+
+
+def _bcrypt_input(password: str) -> bytes:
+    # bcrypt solo usa los primeros 72 bytes (y las versiones nuevas rechazan el resto)
+    return password.encode()[:72]
+
+
+def hash_sync(password: str) -> str:
+    if SCHEME == "argon2":
+        return _argon2.hash(password)
+    if SCHEME == "bcrypt":
+        return bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return (f"$scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$"
+            f"{base64.b64encode(salt).decode()}${base64.b64encode(digest).decode()}")
+
+
+def verify_sync(stored: str, password: str) -> tuple:
+    """Devuelve (coincide, hay_que_rehashear)."""
+    if not stored or not password:
+        return False, False
+    if stored.startswith("$argon2"):
+        if argon2 is None:
+            raise RuntimeError("Hay contraseñas argon2 pero argon2-cffi no está instalado")
+        try:
+            verifier = _argon2 if SCHEME == "argon2" else argon2.PasswordHasher()
+            verifier.verify(stored, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            return False, False
+        return True, SCHEME != "argon2" or _argon2.check_needs_rehash(stored)
+    if stored.startswith(("$2a$", "$2b$", "$2y$")):
+        if bcrypt is None:
+            raise RuntimeError("Hay contraseñas bcrypt pero bcrypt no está instalado")
+        ok = bcrypt.checkpw(_bcrypt_input(password), stored.encode())
+        return ok, ok and (SCHEME != "bcrypt" or int(stored.split("$")[2]) != BCRYPT_ROUNDS)
+    if stored.startswith("$scrypt$"):
+        _, _, n, r, p, salt, digest = stored.split("$")
+        computed = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+        ok = hmac.compare_digest(computed, base64.b64decode(digest))
+        return ok, ok and (SCHEME != "scrypt" or (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P))
+    # Texto plano (usuarios creados antes del hash): se migra al entrar
+    ok = hmac.compare_digest(stored.encode(), password.encode())
+    return ok, ok
+
+
+# Hash de referencia para que un correo inexistente tarde lo mismo que uno válido
+_DUMMY_HASH = None
+
+
+def _dummy_verify(password: str):
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_sync(secrets.token_hex(8))
+    verify_sync(_DUMMY_HASH, password)
+    return False, False
+
+
+# --- API async ---
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool, hash_sync, password)
+
+
+async def verify_password(stored, password: str) -> tuple:
+    """(coincide, hay_que_rehashear). Con stored=None hace el mismo trabajo y devuelve (False, False)."""
+    loop = asyncio.get_running_loop()
+    if stored is None:
+        return await loop.run_in_executor(_pool, _dummy_verify, password)
+    return await loop.run_in_executor(_pool, verify_sync, stored, password)
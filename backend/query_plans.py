@@ -0,0 +1,166 @@
+"""
+Verificación de planes de consulta contra un mongod real.
+
+Ejecuta cada accesor de database.py con valores de ejemplo sacados de la
+base, captura los comandos que envía (ver metrics.captured_commands) y
+repite cada uno con explain(executionStats). Falla si el plan ganador hace
+COLLSCAN, si un $lookup no usa índice o si se examinan más de
+MAX_DOCS_RATIO documentos por cada documento devuelto. También reporta
+los índices del manifiesto (database.INDEXES) que falten.
+
+Uso (mejor con datos de benchmarks/datagen.py):
+    python manage.py check-query-plans
+"""
+from datetime import datetime, timedelta
+from typing import List
+
+import database
+import metrics
+
+MAX_DOCS_RATIO = 3.0
+
+# Comandos de lectura que se pueden repetir con explain
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+_IGNORED_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "cursor"}
+_UNINDEXED_JOINS = {"NestedLoopJoin", "HashJoin"}
+
+
+async def _samples() -> dict:
+    """Valores reales para los filtros (un pedido, su cliente, una sesión...)."""
+    order = await database.orders_collection.find_one({}, {"_id": 0, "id": 1, "user_id": 1}, sort=[("id", -1)]) or {}
+    user = await database.users_collection.find_one({"id": order.get("user_id")} if order else {}, {"_id": 0}) or {}
+    receipt = await database.receipts_collection.find_one({}, {"_id": 0, "order_id": 1}) or {}
+    dish = await database.dishes_collection.find_one({}, {"_id": 0, "id": 1}) or {}
+    session = await database.sessions_collection.find_one({"expires_at": {"$gt": datetime.now()}}, {"_id": 0}) or {}
+    return {
+        "order_id": order.get("id", 1), "user_id": user.get("id", 1), "email": user.get("email", "nadie@mail.com"),
+        "receipt_order_id": receipt.get("order_id", order.get("id", 1)), "dish_id": dish.get("id", 1),
+        "token": session.get("token", "token-inexistente"), "token_user_id": session.get("user_id", 0),
+    }
+
+
+async def _get_dish(s):
+    database.invalidate_menu_cache()  # fuerza la consulta del snapshot
+    return await database.get_dish(s["dish_id"])
+
+
+async def _get_user_by_token(s):
+    database.invalidate_user_sessions_cache(s["token_user_id"])  # sin caché: va a Mongo
+    return await database.get_user_by_token(s["token"])
+
+
+async def _get_sales_summary(s):
+    hasta = datetime.now()
+    return await database.get_sales_summary(hasta - timedelta(days=7), hasta)
+
+
+async def _export_first_batch(name):
+    hasta = datetime.now()
+    batches = database.iter_export_batches(name, hasta - timedelta(days=30), hasta)
+    try:
+        await anext(batches, None)
+    finally:
+        await batches.aclose()
+
+
+# (accesor, llamada con los valores de ejemplo)
+CHECKS = [
+    ("authenticate", lambda s: database.authenticate(s["email"], "x")),
+    ("get_user_by_token", _get_user_by_token),
+    ("get_users_by_ids", lambda s: database.get_users_by_ids([s["user_id"]])),
+    ("get_dish", _get_dish),
+    ("get_order_by_id", lambda s: database.get_order_by_id(s["order_id"])),
+    ("get_orders_by_user", lambda s: database.get_orders_by_user(s["user_id"])),
+    ("get_latest_order_by_user", lambda s: database.get_latest_order_by_user(s["user_id"])),
+    ("get_orders_page(estado)", lambda s: database.get_orders_page(estados=["pendiente", "preparando"], limit=500)),
+    ("get_orders_page(user_id)", lambda s: database.get_orders_page(user_id=s["user_id"])),
+    ("get_orders_due", lambda s: database.get_orders_due("completado", datetime.now())),
+    ("get_orders_en_ruta", lambda s: database.get_orders_en_ruta()),
+    ("get_receipt_by_order_id", lambda s: database.get_receipt_by_order_id(s["receipt_order_id"])),
+    ("get_top_dish_ids", lambda s: database.get_top_dish_ids(3)),
+    ("get_sales_summary", _get_sales_summary),
+    ("get_stats", lambda s: database.get_stats()),
+    ("iter_export_batches(orders)", lambda s: _export_first_batch("orders")),
+    ("iter_export_batches(payments)", lambda s: _export_first_batch("payments")),
+    ("iter_export_batches(receipts)", lambda s: _export_first_batch("receipts")),
+]
+
+
+def analyze(explain: dict, max_ratio: float = MAX_DOCS_RATIO) -> dict:
+    """Resume un explain: etapas del plan ganador, documentos examinados/devueltos y problemas."""
+    stages, problems = [], []
+    totals = {"docs": 0, "returned": None}
+
+    def visit(node):
+        if isinstance(node, list):
+            for item in node: visit(item)
+            return
+        if not isinstance(node, dict):
+            return
+        stage = node.get("stage")
+        if isinstance(stage, str) and stage not in stages:
+            stages.append(stage)
+        if node.get("strategy") in _UNINDEXED_JOINS:
+            problems.append(f"$lookup sin índice ({node['strategy']})")
+        if node.get("collectionScans"):
+            problems.append("$lookup con COLLSCAN")
+        if "$lookup" in node and isinstance(node.get("totalDocsExamined"), int):
+            totals["docs"] += node["totalDocsExamined"]
+        stats = node.get("executionStats")
+        if isinstance(stats, dict):
+            totals["docs"] += stats.get("totalDocsExamined", 0)
+            if totals["returned"] is None:
+                totals["returned"] = stats.get("nReturned")
+        for key, value in node.items():
+            # Los planes descartados pueden tener COLLSCAN sin que importe
+            if key not in ("rejectedPlans", "executionStats"):
+                visit(value)
+        if isinstance(stats, dict):
+            visit(stats.get("executionStages"))
+
+    visit(explain)
+    if "COLLSCAN" in stages:
+        problems.insert(0, "COLLSCAN")
+    returned = totals["returned"] or 0
+    ratio = totals["docs"] / max(returned, 1)
+    if ratio > max_ratio:
+        problems.append(f"{totals['docs']} docs examinados para {returned} devueltos")
+    return {"stages": stages, "docs_examined": totals["docs"], "returned": returned,
+            "ratio": ratio, "problems": problems}
+
+
+async def missing_indexes() -> List[tuple]:
+    """Índices de database.INDEXES que no existen en la base: [(colección, claves)]."""
+    missing = []
+    for name, specs in database.INDEXES.items():
+        existing = [list(info["key"]) for info in (await database.db[name].index_information()).values()]
+        for keys, _ in specs:
+            if [tuple(k) for k in keys] not in [[tuple(k) for k in e] for e in existing]:
+                missing.append((name, keys))
+    return missing
+
+
+async def check_query_plans(max_ratio: float = MAX_DOCS_RATIO) -> List[dict]:
+    """Un resultado por comando de lectura de cada accesor: {accessor, command, collection, ok, ...}."""
+    samples = await _samples()
+    results = []
+    for accessor, call in CHECKS:
+        captured = []
+        token = metrics.captured_commands.set(captured)
+        try:
+            await call(samples)
+        finally:
+            metrics.captured_commands.reset(token)
+        for db_name, command_name, command in captured:
+            if command_name not in EXPLAINABLE:
+                continue
+            spec = {k: v for k, v in command.items() if k not in _IGNORED_FIELDS}
+            if command_name == "aggregate":
+                spec["cursor"] = {}
+            explain = await database.client[db_name].command("explain", spec, verbosity="executionStats")
+            result = analyze(explain, max_ratio)
+            results.append({"accessor": accessor, "command": command_name, "collection": command[command_name],
+                            "ok": not result["problems"], **result})
+    if not results:
+        raise RuntimeError("No se capturaron comandos: se necesita un mongod real (mongomock no tiene explain)")
+    return results
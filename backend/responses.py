@@ -0,0 +1,39 @@
+"""
+Respuesta JSON por defecto de la API.
+
+Serializa con orjson (mucho más rápido que jsonable_encoder + json.dumps
+en listados grandes) y entiende datetime directamente: las fechas salen en
+ISO 8601 sin microsegundos ("2025-01-31T13:45:00"). Sin orjson instalado se
+usa json con el mismo formato.
+"""
+import json
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Respaldo más lento, misma salida
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_OMIT_MICROSECONDS
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)  # ObjectId y similares
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
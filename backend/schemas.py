@@ -0,0 +1,79 @@
+"""
+Modelos de respuesta de los listados grandes.
+
+Documentan la forma de las respuestas en /docs. Los endpoints de listados
+devuelven directamente un ORJSONResponse con los dicts ya formateados, así
+FastAPI no vuelve a validar ni a recorrer cada pedido con jsonable_encoder.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class OrderItemOut(BaseModel):
+    productId: Optional[int] = None
+    productName: str
+    quantity: int
+    priceAtPurchase: float
+
+
+class OrderOut(BaseModel):
+    id: int
+    createdAt: datetime
+    totalAmount: float
+    originalAmount: float
+    discount: float
+    promoName: str
+    status: str
+    clientName: str
+    clientEmail: str
+    deliveryAddress: str
+    paymentMethod: str
+    items: List[OrderItemOut]
+    repartidorNombre: Optional[str] = None
+
+
+class DishOut(BaseModel):
+    id: int
+    nombre: str
+    precio: float
+    categoria: str
+    description: str = ""
+    ingredients: str = ""
+    image: str = ""
+    disponible: bool = True
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
+
+
+class MenuSearchOut(BaseModel):
+    total: int
+    items: List[DishOut]
+    facets: Dict[str, Dict[str, int]]
+
+
+def order_out(order: dict, user: Optional[dict] = None) -> dict:
+    """Pedido de Mongo en la forma de OrderOut ('user' es su cliente, si se conoce)."""
+    # El datetime se serializa en ORJSONResponse (ISO 8601)
+    return {
+        "id": order["id"],
+        "createdAt": order.get("created_at") or datetime.now(),
+        "totalAmount": order.get("total", 0),
+        "originalAmount": order.get("original_total", order.get("total", 0)),
+        "discount": order.get("discount", 0),
+        "promoName": order.get("promo_name", ""),
+        "status": order.get("estado", "pendiente"),
+        "clientName": user.get("nombre", "Sin nombre") if user else "Invitado",
+        "clientEmail": user.get("email", "Sin email") if user else "N/A",
+        "deliveryAddress": order.get("delivery_address", "Retiro en tienda"),
+        "paymentMethod": order.get("payment_method", "Efectivo"),
+        "items": order.get("items", []),
+        "repartidorNombre": order.get("repartidorNombre")
+    }
+
+
+class ClientOut(BaseModel):
+    id: int
+    nombre: str
+    email: str
+    categoria: str = "nuevo"
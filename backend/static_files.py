@@ -0,0 +1,115 @@
+"""
+Archivos estáticos del frontend servidos por la propia API (/frontend).
+
+- Las páginas HTML se comprimen una sola vez al arrancar (gzip y, si está
+  instalado el paquete 'brotli', también br) y se sirven desde memoria
+  según Accept-Encoding, con un ETag fuerte por contenido y codificación.
+  Llevan "no-cache": el navegador revalida y recibe 304 si no cambiaron.
+- Las imágenes con nombre por hash (las subidas, ver images.py) nunca
+  cambian de contenido: se cachean un año como "immutable".
+- El resto de imágenes (las del menú sembrado) se cachean un día.
+"""
+import gzip
+import hashlib
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Sin brotli solo se ofrece gzip
+    brotli = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend")
+
+PRECOMPRESS_SUFFIXES = (".html", ".css", ".js", ".svg", ".json")
+MEDIA_TYPES = {".html": "text/html; charset=utf-8", ".css": "text/css; charset=utf-8",
+               ".js": "text/javascript; charset=utf-8", ".svg": "image/svg+xml", ".json": "application/json"}
+
+# "<16 hex>.ext" o "<16 hex>-<ancho>.ext" (nombres generados por images.py)
+HASHED_NAME = re.compile(r"^([0-9a-f]{16})(-\d+)?\.(jpg|jpeg|png|webp)$")
+
+CACHE_HTML = "no-cache"
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_DEFAULT = "public, max-age=86400"
+
+
+def _accepted_encodings(scope) -> set:
+    header = Headers(scope=scope).get("accept-encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class FrontendFiles(StaticFiles):
+    def __init__(self, directory: str = FRONTEND_DIR):
+        super().__init__(directory=directory, html=True, check_dir=False)
+        self.directory = directory
+        self._precompressed = {}
+
+    def precompress(self) -> dict:
+        """Comprime las páginas en memoria. Devuelve {files, bytes, gzip, br}."""
+        precompressed = {}
+        totals = {"files": 0, "bytes": 0, "gzip": 0, "br": 0}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                ext = os.path.splitext(name)[1].lower()
+                if ext not in PRECOMPRESS_SUFFIXES:
+                    continue
+                full_path = os.path.realpath(os.path.join(root, name))
+                with open(full_path, "rb") as f:
+                    data = f.read()
+                tag = hashlib.sha1(data).hexdigest()[:16]
+                bodies = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+                if brotli is not None:
+                    bodies["br"] = brotli.compress(data, quality=11)
+                precompressed[full_path] = {
+                    "bodies": bodies, "etag": tag, "media_type": MEDIA_TYPES[ext],
+                    "mtime": os.stat(full_path).st_mtime,
+                }
+                totals["files"] += 1
+                totals["bytes"] += len(data)
+                totals["gzip"] += len(bodies["gzip"])
+                totals["br"] += len(bodies.get("br", b""))
+        self._precompressed = precompressed
+        return totals
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        entry = self._precompressed.get(os.path.realpath(full_path))
+        # Si el archivo cambió en disco después de arrancar se sirve tal cual
+        if entry is not None and entry["mtime"] == stat_result.st_mtime:
+            return self._precompressed_response(entry, scope, status_code)
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if HASHED_NAME.match(os.path.basename(full_path)):
+            # El nombre ya es el hash del contenido: ETag fuerte sin leer el archivo
+            response.headers["etag"] = f'"{os.path.basename(full_path).rsplit(".", 1)[0]}"'
+            response.headers["cache-control"] = CACHE_IMMUTABLE
+            if not isinstance(response, NotModifiedResponse) and self.is_not_modified(response.headers, Headers(scope=scope)):
+                return NotModifiedResponse(response.headers)
+        elif full_path.endswith(".html"):
+            response.headers["cache-control"] = CACHE_HTML
+        else:
+            response.headers["cache-control"] = CACHE_DEFAULT
+        return response
+
+    def _precompressed_response(self, entry, scope, status_code: int) -> Response:
+        accepted = _accepted_encodings(scope)
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in entry["bodies"]), "identity")
+        etag = f'"{entry["etag"]}"' if encoding == "identity" else f'"{entry["etag"]}-{encoding}"'
+        headers = {"etag": etag, "cache-control": CACHE_HTML, "vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return NotModifiedResponse(Headers(headers))
+        return Response(entry["bodies"][encoding], status_code=status_code,
+                        media_type=entry["media_type"], headers=headers)